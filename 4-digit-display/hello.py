@@ -25,8 +25,13 @@ tm.brightness(1)  # Brightness: 0 (dim) to 7 (bright)
 # tm.numbers(21, 15) # 21:59
 # tm.number(-123) # -123
 # tm.temperature(24) # 24*C
-# tm.scroll("Hello ")  # Scroll text
+# tm.scroll("Hello ")  # Scroll text (blocks until done)
+
+# Scroll text from a hardware timer, the main loop stays free
+marquee = tm1637.Marquee(tm, delay=250, loop=True)
+marquee.add("Hello ")
+marquee.start()
 
 while True:
-    tm.scroll("Hello ")
+    # read buttons, sensors, ... here
     time.sleep(0.1)
@@ -26,10 +26,15 @@ SOFTWARE.
 
 __version__ = "1.3.0"
 
-from micropython import const
-from machine import Pin
+from micropython import const, schedule
+from machine import Pin, Timer
 from time import sleep_us, sleep_ms
 
+try:
+    import rp2
+except ImportError:
+    rp2 = None
+
 TM1637_CMD1 = const(64)  # 0x40 data command
 TM1637_CMD2 = const(192)  # 0xC0 address command
 TM1637_CMD3 = const(128)  # 0x80 display control command
@@ -44,22 +49,100 @@ _SEGMENTS = bytearray(
     b"\x3f\x06\x5b\x4f\x66\x6d\x7d\x07\x7f\x6f\x77\x7c\x39\x5e\x79\x71\x3d\x76\x06\x1e\x76\x38\x55\x54\x3f\x73\x67\x50\x6d\x78\x3e\x1c\x2a\x76\x6e\x5b\x00\x40\x63"
 )
 
+# ASCII code to segment, 0xff for characters the display cannot show
+_CHARS = bytearray(b"\xff" * 128)
+_CHARS[32] = _SEGMENTS[36]  # space
+_CHARS[42] = _SEGMENTS[38]  # star/degrees
+_CHARS[45] = _SEGMENTS[37]  # dash
+for _i in range(10):
+    _CHARS[48 + _i] = _SEGMENTS[_i]  # 0-9
+for _i in range(26):
+    _CHARS[65 + _i] = _CHARS[97 + _i] = _SEGMENTS[10 + _i]  # A-Z, a-z
+
+# tens and units segments of 00-99, two bytes per number
+_PAIRS = bytearray(200)
+for _i in range(100):
+    _PAIRS[2 * _i] = _SEGMENTS[_i // 10]
+    _PAIRS[2 * _i + 1] = _SEGMENTS[_i % 10]
+del _i
+
+if rp2 is not None:
+    # One start-to-stop transfer per FIFO frame: the byte count minus one,
+    # then the bytes. DIO is the set/out pin, CLK the side-set pin. At the
+    # 800 kHz the state machine runs at, a [7] delay is TM1637_DELAY.
+    @rp2.asm_pio(
+        out_init=rp2.PIO.OUT_HIGH,
+        set_init=rp2.PIO.OUT_HIGH,
+        sideset_init=rp2.PIO.OUT_HIGH,
+        out_shiftdir=rp2.PIO.SHIFT_RIGHT,
+    )
+    def _tm1637_pio():
+        pull()              .side(1)        # byte count - 1, bus idle
+        mov(x, osr)         .side(1)
+        set(pins, 0)        .side(1) [7]    # start: DIO falls while CLK high
+        label("byte")
+        pull()              .side(0) [7]
+        set(y, 7)           .side(0)
+        label("bit")
+        nop()               .side(0) [3]
+        out(pins, 1)        .side(0) [3]    # DIO changes while CLK is low
+        jmp(y_dec, "bit")   .side(1) [7]    # chip samples on the rising edge
+        nop()               .side(0) [3]
+        set(pindirs, 0)     .side(0) [3]    # release DIO for the ACK clock
+        nop()               .side(1) [7]
+        nop()               .side(0) [3]
+        set(pindirs, 1)     .side(0)
+        jmp(x_dec, "byte")  .side(0)
+        set(pins, 0)        .side(0) [7]    # stop: DIO low while CLK low,
+        nop()               .side(1) [7]    # CLK high,
+        set(pins, 1)        .side(1) [7]    # then DIO rises
+
+
+def _asyncio():
+    # imported on first use so scripts without an event loop don't pay for it
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
 
 class TM1637(object):
-    """Library for quad 7-segment LED modules based on the TM1637 LED driver."""
+    """Library for quad 7-segment LED modules based on the TM1637 LED driver.
 
-    def __init__(self, clk, dio, brightness=7):
+    Pass the number of a free PIO state machine as sm to have it run the
+    bus protocol instead of bit-banging from Python. Without rp2 support
+    the pure Python transfer is used either way.
+    """
+
+    def __init__(self, clk, dio, brightness=7, sm=None):
         self.clk = clk
         self.dio = dio
 
         if not 0 <= brightness <= 7:
             raise ValueError("Brightness out of range")
         self._brightness = brightness
+        # byte count - 1, command, up to 6 segments
+        self._frame = bytearray(8)
+        self._frame_mv = memoryview(self._frame)
+        # what the chip holds, so unchanged digits and settings are skipped
+        self._digits = bytearray(6)
+        self._ctrl = -1
+        self._synced = False
+        # reused by the number formatting methods
+        self._buf = bytearray(4)
 
         self.clk.init(Pin.OUT, value=0)
         self.dio.init(Pin.OUT, value=0)
         sleep_us(TM1637_DELAY)
 
+        self._sm = None
+        if sm is not None and rp2 is not None:
+            self._sm = rp2.StateMachine(
+                sm, _tm1637_pio, freq=800_000, sideset_base=clk, set_base=dio, out_base=dio
+            )
+            self._sm.active(1)
+
         self._write_data_cmd()
         self._write_dsp_ctrl()
 
@@ -78,14 +161,28 @@ class TM1637(object):
 
     def _write_data_cmd(self):
         # automatic address increment, normal mode
-        self._start()
-        self._write_byte(TM1637_CMD1)
-        self._stop()
+        self._frame[1] = TM1637_CMD1
+        self._send(1)
 
     def _write_dsp_ctrl(self):
-        # display on, set brightness
+        # display on, set brightness, unless the chip already has it
+        ctrl = TM1637_CMD3 | TM1637_DSP_ON | self._brightness
+        if ctrl == self._ctrl:
+            return
+        self._frame[1] = ctrl
+        self._send(1)
+        self._ctrl = ctrl
+
+    def _send(self, n):
+        # transfer bytes 1 to n of the frame between a start and a stop
+        frame = self._frame
+        if self._sm is not None:
+            frame[0] = n - 1
+            self._sm.put(self._frame_mv[: n + 1])
+            return
         self._start()
-        self._write_byte(TM1637_CMD3 | TM1637_DSP_ON | self._brightness)
+        for i in range(1, n + 1):
+            self._write_byte(frame[i])
         self._stop()
 
     def _write_byte(self, b):
@@ -122,15 +219,55 @@ class TM1637(object):
         and 3rd segments."""
         if not 0 <= pos <= 5:
             raise ValueError("Position out of range")
-        self._write_data_cmd()
-        self._start()
 
-        self._write_byte(TM1637_CMD2 | pos)
+        digits = self._digits
+        if not self._synced:
+            # the chip may show anything, e.g. after a soft reset, so the
+            # first write sends all six digits, the ones not given as blank
+            i = pos
+            for seg in segments:
+                if i == 6:
+                    break
+                digits[i] = seg
+                i += 1
+            self._write_data_cmd()
+            frame = self._frame
+            frame[1] = TM1637_CMD2
+            for i in range(6):
+                frame[i + 2] = digits[i]
+            self._send(7)
+            self._synced = True
+            self._write_dsp_ctrl()
+            return
+
+        # find the span of digits that differ from what the chip shows
+        first = last = -1
+        i = pos
         for seg in segments:
-            self._write_byte(seg)
-        self._stop()
+            if i == 6:
+                break
+            if digits[i] != seg:
+                if first < 0:
+                    first = i
+                last = i
+            i += 1
+
+        if first >= 0:
+            frame = self._frame
+            frame[1] = TM1637_CMD2 | first
+            n = 1
+            for i in range(first, last + 1):
+                n += 1
+                frame[n] = digits[i] = segments[i - pos]
+            self._send(n)
         self._write_dsp_ctrl()
 
+    def refresh(self):
+        """Resend the digits and settings, e.g. after the module lost power."""
+        self._synced = False
+        self._ctrl = -1
+        self.write(self._digits)
+
     def encode_digit(self, digit):
         """Convert a character 0-9, a-f to a segment."""
         return _SEGMENTS[digit & 0x0F]
@@ -147,51 +284,77 @@ class TM1637(object):
     def encode_char(self, char):
         """Convert a character 0-9, a-z, space, dash or star to a segment."""
         o = ord(char)
-        if o == 32:
-            return _SEGMENTS[36]  # space
-        if o == 42:
-            return _SEGMENTS[38]  # star/degrees
-        if o == 45:
-            return _SEGMENTS[37]  # dash
-        if o >= 65 and o <= 90:
-            return _SEGMENTS[o - 55]  # uppercase A-Z
-        if o >= 97 and o <= 122:
-            return _SEGMENTS[o - 87]  # lowercase a-z
-        if o >= 48 and o <= 57:
-            return _SEGMENTS[o - 48]  # 0-9
-        raise ValueError("Character out of range: {:d} '{:s}'".format(o, chr(o)))
+        seg = _CHARS[o] if o < 128 else 0xFF
+        if seg == 0xFF:
+            raise ValueError("Character out of range: {:d} '{:s}'".format(o, chr(o)))
+        return seg
 
     def hex(self, val):
         """Display a hex value 0x0000 through 0xffff, right aligned."""
-        string = "{:04x}".format(val & 0xFFFF)
-        self.write(self.encode_string(string))
+        buf = self._buf
+        buf[0] = _SEGMENTS[(val >> 12) & 0x0F]
+        buf[1] = _SEGMENTS[(val >> 8) & 0x0F]
+        buf[2] = _SEGMENTS[(val >> 4) & 0x0F]
+        buf[3] = _SEGMENTS[val & 0x0F]
+        self.write(buf)
 
     def number(self, num):
         """Display a numeric value -999 through 9999, right aligned."""
         # limit to range -999 to 9999
         num = max(-999, min(num, 9999))
-        string = "{0: >4d}".format(num)
-        self.write(self.encode_string(string))
+        buf = self._buf
+        n = -num if num < 0 else num
+        i = 3
+        while True:
+            buf[i] = _SEGMENTS[n % 10]
+            n //= 10
+            i -= 1
+            if not n:
+                break
+        if num < 0:
+            buf[i] = _SEGMENTS[37]  # dash
+            i -= 1
+        while i >= 0:
+            buf[i] = 0
+            i -= 1
+        self.write(buf)
+
+    def _pair(self, i, num):
+        # two digits with a leading zero, or a dash and a digit for -9 to -1
+        buf = self._buf
+        if num < 0:
+            buf[i] = _SEGMENTS[37]
+            buf[i + 1] = _SEGMENTS[-num]
+        else:
+            buf[i] = _PAIRS[2 * num]
+            buf[i + 1] = _PAIRS[2 * num + 1]
 
     def numbers(self, num1, num2, colon=True):
         """Display two numeric values -9 through 99, with leading zeros
         and separated by a colon."""
-        num1 = max(-9, min(num1, 99))
-        num2 = max(-9, min(num2, 99))
-        segments = self.encode_string("{0:0>2d}{1:0>2d}".format(num1, num2))
+        self._pair(0, max(-9, min(num1, 99)))
+        self._pair(2, max(-9, min(num2, 99)))
         if colon:
-            segments[1] |= 0x80  # colon on
-        self.write(segments)
+            self._buf[1] |= 0x80  # colon on
+        self.write(self._buf)
 
     def temperature(self, num):
+        buf = self._buf
         if num < -9:
-            self.show("lo")  # low
+            buf[0] = _CHARS[108]  # lo
+            buf[1] = _CHARS[111]
         elif num > 99:
-            self.show("hi")  # high
+            buf[0] = _CHARS[104]  # hi
+            buf[1] = _CHARS[105]
+        elif num < 0:
+            buf[0] = _SEGMENTS[37]
+            buf[1] = _SEGMENTS[-num]
         else:
-            string = "{0: >2d}".format(num)
-            self.write(self.encode_string(string))
-        self.write([_SEGMENTS[38], _SEGMENTS[12]], 2)  # degrees C
+            buf[0] = _PAIRS[2 * num] if num > 9 else 0
+            buf[1] = _PAIRS[2 * num + 1]
+        buf[2] = _SEGMENTS[38]  # degrees
+        buf[3] = _SEGMENTS[12]  # C
+        self.write(buf)
 
     def show(self, string, colon=False):
         segments = self.encode_string(string)
@@ -207,6 +370,243 @@ class TM1637(object):
             self.write(data[0 + i : 4 + i])
             sleep_ms(delay)
 
+    async def scroll_async(self, string, delay=250):
+        """Like scroll(), but lets other tasks run between frames."""
+        asyncio = _asyncio()
+        segments = string if isinstance(string, list) else self.encode_string(string)
+        data = [0] * 8
+        data[4:0] = list(segments)
+        for i in range(len(segments) + 5):
+            self.write(data[0 + i : 4 + i])
+            await asyncio.sleep_ms(delay)
+
+
+class TM1637Chain(object):
+    """Several TM1637 modules sharing one CLK pin, each with its own DIO.
+
+    chain[i] is a display with the usual TM1637 API. Its writes only update
+    a copy of the digits; flush() then sends the changes of all displays in
+    one bit-banged pass, setting every DIO before each shared clock pulse,
+    so refreshing N displays costs about as much as refreshing one. With
+    autoflush=True every write is sent at once instead.
+    """
+
+    def __init__(self, clk, dios, brightness=7, autoflush=False):
+        if not 0 <= brightness <= 7:
+            raise ValueError("Brightness out of range")
+        self.clk = clk
+        self.autoflush = autoflush
+        # idle bus: CLK and DIO high, so the first start condition is clean
+        self.clk.init(Pin.OUT, value=1)
+        self.displays = []
+        for dio in dios:
+            dio.init(Pin.OUT, value=1)
+            self.displays.append(_ChainedTM1637(self, dio, brightness))
+        sleep_us(TM1637_DELAY)
+
+    def __getitem__(self, i):
+        return self.displays[i]
+
+    def __len__(self):
+        return len(self.displays)
+
+    def flush(self):
+        """Send the pending digits and brightness of every display."""
+        first = 6
+        last = -1
+        unsynced = False
+        for d in self.displays:
+            if d._first >= 0:
+                first = min(first, d._first)
+                last = max(last, d._last)
+                unsynced = unsynced or not d._synced
+
+        if last >= 0:
+            group = [d for d in self.displays if d._first >= 0]
+            if unsynced:
+                for d in group:
+                    d._frame[0] = TM1637_CMD1
+                self._send(group, 1)
+            # one span covering every display's changes, the others just
+            # resend digits they already show
+            for d in group:
+                frame = d._frame
+                frame[0] = TM1637_CMD2 | first
+                for i in range(first, last + 1):
+                    frame[1 + i - first] = d._digits[i]
+                d._first = d._last = -1
+                d._synced = True
+            self._send(group, 2 + last - first)
+
+        group = []
+        for d in self.displays:
+            ctrl = TM1637_CMD3 | TM1637_DSP_ON | d._brightness
+            if ctrl != d._ctrl:
+                d._frame[0] = d._ctrl = ctrl
+                group.append(d)
+        if group:
+            self._send(group, 1)
+
+    def _send(self, group, n):
+        # the same sequence as TM1637._start/_write_byte/_stop, with every
+        # display in the group clocked by the same CLK edges
+        clk = self.clk
+        for d in group:
+            d.dio(0)
+        sleep_us(TM1637_DELAY)
+        clk(0)
+        sleep_us(TM1637_DELAY)
+        for i in range(n):
+            for bit in range(8):
+                for d in group:
+                    d.dio((d._frame[i] >> bit) & 1)
+                sleep_us(TM1637_DELAY)
+                clk(1)
+                sleep_us(TM1637_DELAY)
+                clk(0)
+                sleep_us(TM1637_DELAY)
+            # ACK clock
+            clk(1)
+            sleep_us(TM1637_DELAY)
+            clk(0)
+            sleep_us(TM1637_DELAY)
+        for d in group:
+            d.dio(0)
+        sleep_us(TM1637_DELAY)
+        clk(1)
+        sleep_us(TM1637_DELAY)
+        for d in group:
+            d.dio(1)
+
+
+class _ChainedTM1637(TM1637):
+    # one display of a TM1637Chain, writes are staged until chain.flush()
+
+    def __init__(self, chain, dio, brightness):
+        self.chain = chain
+        self.dio = dio
+        self._brightness = brightness
+        self._frame = bytearray(7)
+        self._digits = bytearray(6)
+        self._ctrl = -1
+        self._synced = False
+        self._buf = bytearray(4)
+        # span of digits waiting for the next flush, -1 if none
+        self._first = self._last = -1
+
+    def _write_data_cmd(self):
+        pass
+
+    def _write_dsp_ctrl(self):
+        if self.chain.autoflush:
+            self.chain.flush()
+
+    def write(self, segments, pos=0):
+        if not 0 <= pos <= 5:
+            raise ValueError("Position out of range")
+        digits = self._digits
+        if not self._synced:
+            # as in TM1637.write, the first flush sends all six digits
+            self._first = 0
+            self._last = 5
+        i = pos
+        for seg in segments:
+            if i == 6:
+                break
+            if not self._synced or digits[i] != seg:
+                digits[i] = seg
+                if self._first < 0 or i < self._first:
+                    self._first = i
+                if i > self._last:
+                    self._last = i
+            i += 1
+        if self.chain.autoflush:
+            self.chain.flush()
+
+    def refresh(self):
+        self._synced = False
+        self._ctrl = -1
+        self._first = 0
+        self._last = 5
+        if self.chain.autoflush:
+            self.chain.flush()
+
+
+class Marquee(object):
+    """Scroll queued messages across a TM1637 one frame per tick.
+
+    Unlike TM1637.scroll() nothing blocks: call tick() from your own loop,
+    let start() drive it from a hardware timer, or await run() in an
+    asyncio task. With loop=True finished messages go back on the queue.
+    """
+
+    def __init__(self, tm, delay=250, loop=False):
+        self.tm = tm
+        self.delay = delay
+        self.loop = loop
+        self._queue = []
+        self._window = None
+        self._pos = 0
+        self._timer = None
+        # bound once, creating it inside the timer interrupt would allocate
+        self._scheduled_tick = self._tick_from_timer
+
+    def add(self, message):
+        """Queue a string or a list of segments to scroll."""
+        segments = message if isinstance(message, list) else self.tm.encode_string(message)
+        # four blank digits either side, each frame shows a 4 byte slice
+        window = bytearray(len(segments) + 8)
+        window[4 : 4 + len(segments)] = bytes(segments)
+        self._queue.append(memoryview(window))
+
+    def clear(self):
+        """Drop the queue and the message being shown."""
+        self._queue = []
+        self._window = None
+
+    def busy(self):
+        return self._window is not None or len(self._queue) > 0
+
+    def tick(self):
+        """Show the next frame. Returns False when there is nothing to show."""
+        if self._window is None:
+            if not self._queue:
+                return False
+            self._window = self._queue.pop(0)
+            self._pos = 0
+        window = self._window
+        self.tm.write(window[self._pos : self._pos + 4])
+        self._pos += 1
+        if self._pos > len(window) - 4:
+            if self.loop:
+                self._queue.append(window)
+            self._window = None
+        return True
+
+    def start(self, timer_id=-1):
+        """Advance every delay ms from a hardware timer."""
+        self.stop()
+        self._timer = Timer(timer_id)
+        self._timer.init(period=self.delay, mode=Timer.PERIODIC, callback=self._on_timer)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _on_timer(self, timer):
+        # bit-banging is too slow for interrupt context, run it soon after
+        schedule(self._scheduled_tick, 0)
+
+    def _tick_from_timer(self, _):
+        self.tick()
+
+    async def run(self):
+        """Scroll until the queue is empty, yielding between frames."""
+        asyncio = _asyncio()
+        while self.tick():
+            await asyncio.sleep_ms(self.delay)
+
 
 class TM1637Decimal(TM1637):
     """Library for quad 7-segment LED modules based on the TM1637 LED driver.
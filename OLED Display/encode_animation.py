@@ -0,0 +1,130 @@
+"""
+Encode images into an animation file for lib/ssd1306_anim.py
+
+Run this on a PC, not on the board. It needs Pillow (pip install pillow)
+and takes a list of PNG frames or one animated GIF:
+
+    python encode_animation.py frames/*.png -o anim.bin --fps 15
+    python encode_animation.py spinner.gif -o anim.bin --width 128 --height 32
+
+Copy anim.bin to the board and play it with:
+
+    from ssd1306_anim import AnimationPlayer
+    AnimationPlayer(oled, "anim.bin").play(loop=True)
+"""
+
+import argparse
+import struct
+import sys
+
+MAGIC = b"SSDA"
+VERSION = 1
+HEADER = "<4sBBBBHH"
+
+
+def load_frames(paths, width, height, threshold, invert):
+    """Yield each input frame as a 1-bit Pillow image of the panel size."""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError:
+        sys.exit("encode_animation.py needs Pillow: pip install pillow")
+    for path in paths:
+        with Image.open(path) as image:
+            for frame in ImageSequence.Iterator(image):
+                gray = frame.convert("L")
+                if gray.size != (width, height):
+                    gray = gray.resize((width, height))
+                yield gray.point(lambda v: 255 if (v >= threshold) != invert else 0, "1")
+
+
+def to_buffer(image, width, height):
+    """Pack a 1-bit image in the SSD1306 MONO_VLSB page layout."""
+    pixels = image.load()
+    buf = bytearray(width * height // 8)
+    for page in range(height // 8):
+        for x in range(width):
+            b = 0
+            for bit in range(8):
+                if pixels[x, page * 8 + bit]:
+                    b |= 1 << bit
+            buf[page * width + x] = b
+    return buf
+
+
+def encode_frame(prev, cur):
+    """Return the op stream turning buffer prev into buffer cur."""
+    out = bytearray()
+    n = len(cur)
+    skip = 0
+    i = 0
+    while i < n:
+        if cur[i] == prev[i]:
+            skip += 1
+            i += 1
+            continue
+        while skip >= 64:
+            blocks = min(skip >> 6, 64)
+            out.append(0xC0 | (blocks - 1))
+            skip -= blocks << 6
+        if skip:
+            out.append(skip - 1)
+            skip = 0
+        run = 1
+        while i + run < n and run < 64 and cur[i + run] == cur[i]:
+            run += 1
+        if run >= 3:
+            out.append(0x80 | (run - 1))
+            out.append(cur[i])
+            i += run
+            continue
+        # literal, until a stretch that a skip or repeat encodes better
+        j = i
+        while j < n and j - i < 64:
+            if j + 1 < n and cur[j] == prev[j] and cur[j + 1] == prev[j + 1]:
+                break
+            if j + 2 < n and cur[j] == cur[j + 1] == cur[j + 2]:
+                break
+            j += 1
+        if j == i:
+            j = i + 1
+        out.append(0x40 | (j - i - 1))
+        out += cur[i:j]
+        i = j
+    return bytes(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", nargs="+", help="PNG frames or an animated GIF")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--width", type=int, default=128)
+    parser.add_argument("--height", type=int, default=64)
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--threshold", type=int, default=128)
+    parser.add_argument("--invert", action="store_true")
+    args = parser.parse_args()
+
+    prev = bytearray(args.width * args.height // 8)
+    frames = []
+    for image in load_frames(args.inputs, args.width, args.height, args.threshold, args.invert):
+        cur = to_buffer(image, args.width, args.height)
+        frames.append(encode_frame(prev, cur))
+        prev = cur
+
+    longest = max(len(f) for f in frames)
+    with open(args.output, "wb") as f:
+        f.write(
+            struct.pack(
+                HEADER, MAGIC, VERSION, args.width, args.height, args.fps, len(frames), longest
+            )
+        )
+        for ops in frames:
+            f.write(struct.pack("<H", len(ops)))
+            f.write(ops)
+    raw = len(frames) * len(prev)
+    size = sum(len(f) + 2 for f in frames)
+    print("{} frames, {} bytes ({:.1%} of raw)".format(len(frames), size, size / raw))
+
+
+if __name__ == "__main__":
+    main()
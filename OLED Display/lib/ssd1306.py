@@ -3,6 +3,20 @@
 from micropython import const
 import framebuf
 
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+
+def _asyncio():
+    # imported on first use so scripts without an event loop don't pay for it
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
 
 # register definitions
 SET_CONTRAST = const(0x81)
@@ -22,105 +36,450 @@ SET_DISP_CLK_DIV = const(0xD5)
 SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
+SET_HWSCROLL_OFF = const(0x2E)
+SET_HWSCROLL_ON = const(0x2F)
+SET_HWSCROLL_RIGHT = const(0x26)
+SET_HWSCROLL_LEFT = const(0x27)
+SET_HWSCROLL_VR = const(0x29)
+SET_HWSCROLL_VL = const(0x2A)
+SET_VSCROLL_AREA = const(0xA3)
+
+# frames between hardware scroll steps, indexed by the register value
+_SCROLL_FRAMES = (5, 64, 128, 256, 3, 4, 25, 2)
+
+# unchanged bytes tolerated inside one diff span, cheaper than a new window
+_DIFF_GAP = const(8)
 
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, diff=False):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self._mv = memoryview(self.buffer)
+        # column range touched per page since the last show(), lo > hi if clean
+        self._dirty_lo = bytearray(b"\xff" * self.pages)
+        self._dirty_hi = bytearray(self.pages)
+        # copy of the frame last sent, show() then only sends what differs
+        self._shadow = bytearray(len(self.buffer)) if diff else None
+        self._synced = False
+        self._window = bytearray(6)
+        # second frame and worker state for show_background(), made on first use
+        self._back = None
+        self._flush_error = None
+        # set once core1 turned out to be taken, show_background() is show()
+        self._no_worker = False
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
     def init_display(self):
-        for cmd in (
-            SET_DISP | 0x00,  # off
-            # address setting
-            SET_MEM_ADDR,
-            0x00,  # horizontal
-            # resolution and layout
-            SET_DISP_START_LINE | 0x00,
-            SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
-            SET_MUX_RATIO,
-            self.height - 1,
-            SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
-            SET_DISP_OFFSET,
-            0x00,
-            SET_COM_PIN_CFG,
-            0x02 if self.width > 2 * self.height else 0x12,
-            # timing and driving scheme
-            SET_DISP_CLK_DIV,
-            0x80,
-            SET_PRECHARGE,
-            0x22 if self.external_vcc else 0xF1,
-            SET_VCOM_DESEL,
-            0x30,  # 0.83*Vcc
-            # display
-            SET_CONTRAST,
-            0xFF,  # maximum
-            SET_ENTIRE_ON,  # output follows RAM contents
-            SET_NORM_INV,  # not inverted
-            # charge pump
-            SET_CHARGE_PUMP,
-            0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+        self.wait_show()
+        self.write_cmds(
+            bytes(
+                (
+                    SET_DISP | 0x00,  # off
+                    # address setting
+                    SET_MEM_ADDR,
+                    0x00,  # horizontal
+                    # resolution and layout
+                    SET_DISP_START_LINE | 0x00,
+                    SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
+                    SET_MUX_RATIO,
+                    self.height - 1,
+                    SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
+                    SET_DISP_OFFSET,
+                    0x00,
+                    SET_COM_PIN_CFG,
+                    0x02 if self.width > 2 * self.height else 0x12,
+                    # timing and driving scheme
+                    SET_DISP_CLK_DIV,
+                    0x80,
+                    SET_PRECHARGE,
+                    0x22 if self.external_vcc else 0xF1,
+                    SET_VCOM_DESEL,
+                    0x30,  # 0.83*Vcc
+                    # display
+                    SET_CONTRAST,
+                    0xFF,  # maximum
+                    SET_ENTIRE_ON,  # output follows RAM contents
+                    SET_NORM_INV,  # not inverted
+                    # charge pump
+                    SET_CHARGE_PUMP,
+                    0x10 if self.external_vcc else 0x14,
+                    SET_DISP | 0x01,  # on
+                )
+            )
+        )
+        self._synced = False
         self.fill(0)
         self.show()
 
+    # The command methods wait for a background transfer first, core1 may
+    # be using the bus. write_cmd() and write_cmds() must not, the worker
+    # calls them.
+
     def poweroff(self):
+        self.wait_show()
         self.write_cmd(SET_DISP | 0x00)
 
     def poweron(self):
+        self.wait_show()
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.wait_show()
+        self.write_cmds(bytes((SET_CONTRAST, contrast)))
 
     def invert(self, invert):
+        self.wait_show()
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def start_line(self, line):
+        """Show the display RAM starting at row line, wrapping around, to
+        pan the picture vertically without resending it."""
+        self.wait_show()
+        self.write_cmd(SET_DISP_START_LINE | (line & 0x3F))
+
+    def hw_scroll(self, right=True, start_page=0, end_page=None, frames=2, vertical=0):
+        """Let the controller scroll pages start_page to end_page by one
+        column every frames frames (2, 3, 4, 5, 25, 64, 128 or 256).
+        A vertical offset of 1-63 rows per step scrolls diagonally, limited
+        to the rows set with hw_scroll_area(). Drawing and show() should
+        wait until hw_scroll_off()."""
+        if frames not in _SCROLL_FRAMES:
+            raise ValueError("Unsupported scroll interval")
+        if end_page is None:
+            end_page = self.pages - 1
+        self.wait_show()
+        self.write_cmd(SET_HWSCROLL_OFF)
+        interval = _SCROLL_FRAMES.index(frames)
+        if vertical:
+            cmd = SET_HWSCROLL_VR if right else SET_HWSCROLL_VL
+            self.write_cmds(bytes((cmd, 0x00, start_page, interval, end_page, vertical & 0x3F)))
+        else:
+            cmd = SET_HWSCROLL_RIGHT if right else SET_HWSCROLL_LEFT
+            self.write_cmds(bytes((cmd, 0x00, start_page, interval, end_page, 0x00, 0xFF)))
+        self.write_cmd(SET_HWSCROLL_ON)
+
+    def hw_scroll_area(self, fixed_rows=0, rows=None):
+        """Keep the top fixed_rows still and scroll the next rows rows
+        vertically in a diagonal hw_scroll()."""
+        if rows is None:
+            rows = self.height - fixed_rows
+        self.wait_show()
+        self.write_cmds(bytes((SET_VSCROLL_AREA, fixed_rows, rows)))
+
+    def hw_scroll_off(self):
+        """Stop hardware scrolling. The controller leaves its RAM shifted,
+        so the whole frame goes out again on the next show()."""
+        self.wait_show()
+        self.write_cmd(SET_HWSCROLL_OFF)
+        self._synced = False
+        self.mark_dirty()
+
+    def write_cmds(self, cmds):
+        """Send a sequence of command bytes, transports that can batch
+        them into one transfer override this."""
+        for cmd in cmds:
+            self.write_cmd(cmd)
+
+    def mark_dirty(self, x=0, y=0, w=None, h=None):
+        """Flag a region as changed so the next show() sends it.
+        Drawing through the methods below does this automatically, call it
+        after writing to self.buffer directly. No arguments marks the
+        whole display."""
+        if w is None:
+            w = self.width - x
+        if h is None:
+            h = self.height - y
+        x0 = max(x, 0)
+        x1 = min(x + w, self.width) - 1
+        y0 = max(y, 0)
+        y1 = min(y + h, self.height) - 1
+        if x0 > x1 or y0 > y1:
+            return
+        lo = self._dirty_lo
+        hi = self._dirty_hi
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            if x0 < lo[page]:
+                lo[page] = x0
+            if x1 > hi[page]:
+                hi[page] = x1
+
+    def fill(self, c):
+        super().fill(c)
+        self.mark_dirty()
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self.mark_dirty(x, y, 1, 1)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self.mark_dirty(x, y, w, 1)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self.mark_dirty(x, y, 1, h)
+
+    def line(self, x1, y1, x2, y2, c):
+        super().line(x1, y1, x2, y2, c)
+        self.mark_dirty(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+    def rect(self, x, y, w, h, c, *f):
+        super().rect(x, y, w, h, c, *f)
+        self.mark_dirty(x, y, w, h)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self.mark_dirty(x, y, w, h)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self.mark_dirty(x - xr, y - yr, 2 * xr + 1, 2 * yr + 1)
+
+    def poly(self, x, y, coords, c, *f):
+        super().poly(x, y, coords, c, *f)
+        x0 = x1 = coords[0]
+        y0 = y1 = coords[1]
+        for i in range(2, len(coords), 2):
+            x0 = min(x0, coords[i])
+            x1 = max(x1, coords[i])
+            y0 = min(y0, coords[i + 1])
+            y1 = max(y1, coords[i + 1])
+        self.mark_dirty(x + x0, y + y0, x1 - x0 + 1, y1 - y0 + 1)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self.mark_dirty(x, y, 8 * len(s), 8)
+
+    def blit(self, fbuf, x, y, *args):
+        super().blit(fbuf, x, y, *args)
+        if isinstance(fbuf, tuple):
+            # (buffer, width, height, format) source of known size
+            self.mark_dirty(x, y, fbuf[1], fbuf[2])
+        else:
+            # a FrameBuffer does not expose its size
+            self.mark_dirty(x, y)
+
+    def scroll(self, xstep, ystep):
+        super().scroll(xstep, ystep)
+        self.mark_dirty()
+
+    def _write_window(self, x0, x1, p0, p1):
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
             x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        window = self._window
+        window[0] = SET_COL_ADDR
+        window[1] = x0
+        window[2] = x1
+        window[3] = SET_PAGE_ADDR
+        window[4] = p0
+        window[5] = p1
+        self.write_cmds(window)
+
+    def show(self):
+        """Send the regions changed since the last call to the display."""
+        self.wait_show()
+        self._flush(self.buffer, self._mv, self._dirty_lo, self._dirty_hi)
+
+    def show_background(self):
+        """Start sending the current frame and return straight away.
+
+        The frame is copied to a second buffer that the second core sends
+        while the caller keeps drawing into self.buffer. Use show_done() or
+        wait_show() to learn when the transfer has finished. The methods
+        of this class wait for it themselves, other devices on the same
+        bus must be left alone until then.
+
+        The RP2040 runs a single thread on its second core, so only one
+        display can send in the background, and only if the script does
+        not use the second core itself. Otherwise, and without _thread,
+        this is a plain show().
+        """
+        if _thread is None or self._no_worker:
+            self.show()
+            return
+        if self._back is None:
+            self._back = bytearray(len(self.buffer))
+            self._back_mv = memoryview(self._back)
+            self._back_lo = bytearray(self.pages)
+            self._back_hi = bytearray(self.pages)
+            self._go = _thread.allocate_lock()
+            self._go.acquire()
+            self._idle = _thread.allocate_lock()
+            try:
+                _thread.start_new_thread(self._flush_worker, ())
+            except OSError:
+                # core1 is already running a thread
+                self._back = None
+                self._no_worker = True
+                self.show()
+                return
+        self._idle.acquire()
+        if self._flush_error is not None:
+            self._idle.release()
+            self._raise_flush_error()
+        self._back[:] = self.buffer
+        lo = self._dirty_lo
+        hi = self._dirty_hi
+        for page in range(self.pages):
+            self._back_lo[page] = lo[page]
+            self._back_hi[page] = hi[page]
+            lo[page] = 0xFF
+            hi[page] = 0
+        self._go.release()
+
+    async def show_async(self):
+        """Send the frame from the background, yielding to other tasks
+        until the transfer has finished."""
+        asyncio = _asyncio()
+        while not self.show_done():
+            await asyncio.sleep_ms(0)
+        self.show_background()
+        while not self.show_done():
+            await asyncio.sleep_ms(0)
+        self._raise_flush_error()
+
+    def show_done(self):
+        """Return True once no background transfer is in progress. Raises
+        the error of a transfer that failed."""
+        if self._back is None or not self._idle.acquire(0):
+            return self._back is None
+        self._idle.release()
+        self._raise_flush_error()
+        return True
+
+    def wait_show(self):
+        """Block until a background transfer started by show_background()
+        has finished."""
+        if self._back is not None:
+            self._idle.acquire()
+            self._idle.release()
+            self._raise_flush_error()
+
+    def _raise_flush_error(self):
+        # only called while the worker is idle, so the back ranges are stable
+        error = self._flush_error
+        if error is not None:
+            self._flush_error = None
+            # the frame did not make it, send its regions again next time
+            lo = self._dirty_lo
+            hi = self._dirty_hi
+            for page in range(self.pages):
+                if self._back_lo[page] < lo[page]:
+                    lo[page] = self._back_lo[page]
+                if self._back_hi[page] > hi[page]:
+                    hi[page] = self._back_hi[page]
+            raise error
+
+    def _flush_worker(self):
+        while True:
+            self._go.acquire()
+            try:
+                self._flush(self._back, self._back_mv, self._back_lo, self._back_hi)
+            except Exception as e:
+                self._flush_error = e
+            self._idle.release()
+
+    def _flush(self, buf, mv, lo, hi):
+        pages = self.pages
+        diff = self._shadow is not None and self._synced
+        try:
+            self._flush_pages(buf, mv, lo, hi, diff)
+        except Exception:
+            # the shadow may hold bytes that never reached the panel
+            self._synced = False
+            raise
+        for page in range(pages):
+            lo[page] = 0xFF
+            hi[page] = 0
+        if self._shadow is not None and not self._synced:
+            self._shadow[:] = buf
+            self._synced = True
+
+    def _flush_pages(self, buf, mv, lo, hi, diff):
+        width = self.width
+        pages = self.pages
+        page = 0
+        while page < pages:
+            x0 = lo[page]
+            x1 = hi[page]
+            if x0 > x1:
+                page += 1
+                continue
+            if diff:
+                self._flush_diff(buf, mv, page, x0, x1)
+                page += 1
+                continue
+            end = page + 1
+            if x0 == 0 and x1 == width - 1:
+                # full width pages are contiguous in the buffer, send as one
+                while end < pages and lo[end] == 0 and hi[end] == width - 1:
+                    end += 1
+            self._write_window(x0, x1, page, end - 1)
+            self.write_data(mv[page * width + x0 : (end - 1) * width + x1 + 1])
+            page = end
+
+    def _flush_diff(self, buf, mv, page, x0, x1):
+        # single pass over the dirty columns of one page, updating the shadow
+        # as it goes and sending each run of changed bytes as its own window
+        shadow = self._shadow
+        base = page * self.width
+        i = base + x0
+        end = base + x1 + 1
+        while i < end:
+            if buf[i] == shadow[i]:
+                i += 1
+                continue
+            start = last = i
+            while i < end:
+                b = buf[i]
+                if b != shadow[i]:
+                    shadow[i] = b
+                    last = i
+                elif i - last > _DIFF_GAP:
+                    break
+                i += 1
+            self._write_window(start - base, last - base, page, page)
+            self.write_data(mv[start : last + 1])
 
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False, diff=False):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
-        super().__init__(width, height, external_vcc)
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        super().__init__(width, height, external_vcc, diff)
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def write_cmds(self, cmds):
+        # one control byte, then every following byte is a command
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
 
 class SSD1306_SPI(SSD1306):
-    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
+    def __init__(
+        self, width, height, spi, dc, res, cs, external_vcc=False, diff=False, shared_bus=False
+    ):
         self.rate = 10 * 1024 * 1024
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
@@ -129,6 +488,12 @@ class SSD1306_SPI(SSD1306):
         self.dc = dc
         self.res = res
         self.cs = cs
+        # with other devices on the bus its settings must be restored before
+        # every transfer, otherwise configuring it once is enough
+        self.shared_bus = shared_bus
+        if not shared_bus:
+            self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.temp = bytearray(1)
         import time
 
         self.res(1)
@@ -136,20 +501,23 @@ class SSD1306_SPI(SSD1306):
         self.res(0)
         time.sleep_ms(10)
         self.res(1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, diff)
 
-    def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+    def _write(self, dc, buf):
+        if self.shared_bus:
+            self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
-        self.dc(0)
+        self.dc(dc)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(buf)
         self.cs(1)
 
+    def write_cmd(self, cmd):
+        self.temp[0] = cmd
+        self._write(0, self.temp)
+
+    def write_cmds(self, cmds):
+        self._write(0, cmds)
+
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
-        self.dc(1)
-        self.cs(0)
-        self.spi.write(buf)
-        self.cs(1)
+        self._write(1, buf)
@@ -0,0 +1,129 @@
+# Compact animation player for the SSD1306 driver
+#
+# Animations are made on a PC with encode_animation.py and copied to the
+# board. Each frame is stored as the difference to the one before it, run
+# length encoded, and decoded straight into the display buffer so only the
+# changed bytes are touched and sent.
+#
+# File layout, little endian:
+#   header  "SSDA", version, width, height, fps, frame count (u16),
+#           longest frame (u16)
+#   frames  length (u16) followed by that many op bytes
+#
+# Ops walk the buffer in its MONO_VLSB page order. The top two bits pick
+# the op, the low six bits hold a count n:
+#   00  skip n+1 unchanged bytes
+#   01  copy the next n+1 bytes
+#   10  repeat the next byte n+1 times
+#   11  skip (n+1)*64 unchanged bytes
+# The first frame is relative to a blank screen.
+
+import struct
+import time
+
+MAGIC = b"SSDA"
+VERSION = 1
+HEADER = "<4sBBBBHH"
+
+
+class AnimationPlayer:
+    """Play an animation file on an SSD1306 of the same size.
+
+    The display buffer is cleared here, since the first frame is decoded
+    on top of a blank screen.
+    """
+
+    def __init__(self, display, path):
+        self.display = display
+        self._file = open(path, "rb")
+        magic, version, width, height, fps, count, longest = struct.unpack(
+            HEADER, self._file.read(struct.calcsize(HEADER))
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an animation file")
+        if width != display.width or height != display.height:
+            raise ValueError("Animation is {}x{}".format(width, height))
+        self.fps = fps
+        self.frames = count
+        self.index = 0
+        self._start = self._file.tell()
+        self._ops = bytearray(longest)
+        self._ops_mv = memoryview(self._ops)
+        self._len = bytearray(2)
+        self.rewind()
+
+    def close(self):
+        self._file.close()
+
+    def rewind(self):
+        """Go back to the first frame and blank the screen it starts from."""
+        self._file.seek(self._start)
+        self.index = 0
+        self.display.fill(0)
+
+    def next_frame(self):
+        """Decode the next frame into the display buffer without showing
+        it. Returns False after the last frame."""
+        if self.index >= self.frames:
+            return False
+        self._file.readinto(self._len)
+        n = self._len[0] | self._len[1] << 8
+        self._file.readinto(self._ops_mv[:n])
+        self._decode(n)
+        self.index += 1
+        return True
+
+    def play(self, fps=None, loop=False):
+        """Show every frame at fps (the file's own rate by default),
+        blocking until the end, or forever with loop=True."""
+        period = 1000 // (fps or self.fps)
+        due = time.ticks_ms()
+        while True:
+            if not self.next_frame():
+                if not loop:
+                    return
+                self.rewind()
+                continue
+            self.display.show()
+            due = time.ticks_add(due, period)
+            wait = time.ticks_diff(due, time.ticks_ms())
+            if wait > 0:
+                time.sleep_ms(wait)
+            else:
+                # running late, restart the schedule rather than rushing
+                due = time.ticks_ms()
+
+    def _decode(self, n):
+        ops = self._ops
+        buf = self.display.buffer
+        width = self.display.width
+        mark = self.display.mark_dirty
+        pos = 0
+        i = 0
+        while i < n:
+            op = ops[i]
+            count = (op & 0x3F) + 1
+            kind = op >> 6
+            i += 1
+            if kind == 0:
+                pos += count
+                continue
+            if kind == 3:
+                pos += count << 6
+                continue
+            if kind == 1:
+                for j in range(count):
+                    buf[pos + j] = ops[i + j]
+                i += count
+            else:
+                b = ops[i]
+                for j in range(count):
+                    buf[pos + j] = b
+                i += 1
+            # mark the run page by page, it may wrap onto the next page
+            end = pos + count
+            while pos < end:
+                page, col = divmod(pos, width)
+                run = min(end - pos, width - col)
+                mark(col, page << 3, run, 8)
+                pos += run
@@ -0,0 +1,118 @@
+# Cached text rendering for the SSD1306 driver
+#
+# Strings are rendered once into small framebuffers and blitted from then
+# on, so redrawing the same "23.4 C" every cycle is a single blit with no
+# allocation. Besides the built-in 8x8 font a compact 3x5 numeric font can
+# be drawn at any integer scale for large readouts. Blitting from a
+# (buffer, width, height, format) source needs MicroPython 1.20 or later.
+
+import framebuf
+
+# 3x5 numeric font, two bytes per glyph: five rows of three bits, top row
+# in the highest bits, leftmost pixel in the highest bit of each row
+BIG_CHARS = "0123456789-.: C*%"
+_BIG_GLYPHS = bytes(
+    (
+        0x7B, 0x6F,  # 0
+        0x2C, 0x97,  # 1
+        0x73, 0xE7,  # 2
+        0x73, 0xCF,  # 3
+        0x5B, 0xC9,  # 4
+        0x79, 0xCF,  # 5
+        0x79, 0xEF,  # 6
+        0x72, 0x49,  # 7
+        0x7B, 0xEF,  # 8
+        0x7B, 0xCF,  # 9
+        0x01, 0xC0,  # -
+        0x00, 0x02,  # .
+        0x04, 0x10,  # :
+        0x00, 0x00,  # space
+        0x79, 0x27,  # C
+        0x2A, 0x80,  # * (degree sign)
+        0x52, 0xA5,  # %
+    )
+)
+
+
+class TextCache:
+    """Draw strings on an SSD1306 through an LRU cache of rendered text.
+
+    scale=1 uses the built-in 8x8 font. A larger scale uses the 3x5 font in
+    BIG_CHARS, each glyph 3*scale x 5*scale pixels plus scale pixels of
+    spacing. The cache holds at most max_bytes of rendered text and evicts
+    the least recently drawn string when full.
+    """
+
+    def __init__(self, display, max_bytes=1024, scale=1):
+        self.display = display
+        self.max_bytes = max_bytes
+        self.scale = scale
+        self.used = 0
+        # one dict per colour, string -> [blit source, width, height, size, last use]
+        self._cache = ({}, {})
+        self._tick = 0
+
+    def size(self, s):
+        """Return the (width, height) in pixels of s in this font."""
+        if self.scale == 1:
+            return 8 * len(s), 8
+        return 4 * self.scale * len(s) - self.scale, 5 * self.scale
+
+    def text(self, s, x, y, c=1):
+        """Draw s with its top left corner at x, y. Pixels around the
+        glyphs are left untouched, as with FrameBuffer.text."""
+        entry = self._cache[c].get(s)
+        if entry is None:
+            entry = self._render(s, c)
+        self._tick += 1
+        entry[4] = self._tick
+        # a (buffer, width, height, format) source tells the driver its
+        # size, so only that area is marked dirty
+        self.display.blit(entry[0], x, y, c ^ 1)
+
+    def clear(self):
+        """Drop every cached string."""
+        self._cache[0].clear()
+        self._cache[1].clear()
+        self.used = 0
+
+    def _render(self, s, c):
+        w, h = self.size(s)
+        size = ((h + 7) >> 3) * w
+        while self.used + size > self.max_bytes and self.used:
+            self._evict()
+        buf = bytearray(size)
+        fb = framebuf.FrameBuffer(buf, w, h, framebuf.MONO_VLSB)
+        fb.fill(c ^ 1)
+        if self.scale == 1:
+            fb.text(s, 0, 0, c)
+        else:
+            self._draw_big(fb, s, c)
+        entry = [(buf, w, h, framebuf.MONO_VLSB), w, h, size, 0]
+        self._cache[c][s] = entry
+        self.used += size
+        return entry
+
+    def _draw_big(self, fb, s, c):
+        n = self.scale
+        x = 0
+        for ch in s:
+            i = BIG_CHARS.find(ch)
+            if i < 0:
+                raise ValueError("Character not in big font: %r" % ch)
+            bits = _BIG_GLYPHS[2 * i] << 8 | _BIG_GLYPHS[2 * i + 1]
+            for row in range(5):
+                for col in range(3):
+                    if bits & (1 << (14 - 3 * row - col)):
+                        fb.fill_rect(x + col * n, row * n, n, n, c)
+            x += 4 * n
+
+    def _evict(self):
+        oldest = None
+        for cache in self._cache:
+            for key, entry in cache.items():
+                if oldest is None or entry[4] < oldest[2][4]:
+                    oldest = (cache, key, entry)
+        cache, key, entry = oldest
+        del cache[key]
+        self.used -= entry[3]
@@ -1,11 +1,10 @@
 # Display Image & text on I2C driven ssd1306 OLED display 
 from machine import Pin, I2C
 from ssd1306 import SSD1306_I2C
-import machine
+from temp_sensor import TempSensor
 import utime
  
-sensor_temp = machine.ADC(4)
-conversion_factor = 3.3 / (65535)
+sensor = TempSensor()                                   # RP2040 sensor on ADC channel 4
  
 WIDTH  = 128                                            # oled display width
 HEIGHT = 32                                           # oled display height
@@ -18,8 +17,7 @@ i2c = I2C(0, scl=Pin(9), sda=Pin(8), freq=200000)       # Init I2C using pins GP
 oled = SSD1306_I2C(WIDTH, HEIGHT, i2c)                  # Init oled display
  
 while True:
-    reading = sensor_temp.read_u16() * conversion_factor
-    temperature = 27 - (reading - 0.706)/0.001721
+    temperature = sensor.read()
     #print(temperature)
  
     # Clear the oled display in case it has junk on it.
@@ -0,0 +1,111 @@
+# Filtered reader for the RP2040 internal temperature sensor
+#
+#     from temp_sensor import TempSensor
+#     sensor = TempSensor(filter="median")
+#     print(sensor.read())
+#
+# or let a timer keep it fresh and pick up the value whenever you like:
+#
+#     sensor.start(1000)
+#     print(sensor.latest())
+#
+# Each reading is a burst of ADC samples averaged into one (oversampling),
+# then passed through an optional filter over the last few readings.
+
+from array import array
+from machine import ADC, Timer
+from micropython import schedule
+
+# The sensor gives 0.706 V at 27 C and drops 1.721 mV per degree
+V27 = 0.706
+SLOPE = 0.001721
+
+FILTERS = (None, "average", "ema", "median")
+
+
+class TempSensor:
+    """RP2040 temperature sensor on ADC channel 4.
+
+    samples ADC reads make one reading. filter smooths readings over time:
+    "average" and "median" over the last window readings, "ema" with
+    weight alpha for the newest one. The result is corrected as
+    temperature * gain + offset, for a sensor checked against a
+    thermometer. vref is the ADC reference, 3.3 V on the Pico.
+    """
+
+    def __init__(self, samples=16, filter=None, window=5, alpha=0.25,
+                 offset=0.0, gain=1.0, vref=3.3, channel=4):
+        if filter not in FILTERS:
+            raise ValueError("Unknown filter: %r" % filter)
+        self.adc = ADC(channel)
+        self.samples = samples
+        self.filter = filter
+        self.alpha = alpha
+        # temperature = base - step * (sum of samples), folded once here
+        volts = vref / 65535 / samples
+        self._base = (27 + V27 / SLOPE) * gain + offset
+        self._step = volts / SLOPE * gain
+        self._history = array("f", [0] * window)
+        self._count = 0
+        self._pos = 0
+        self._sum = 0.0
+        self.value = None
+        self._timer = None
+        # bound once, creating it inside the timer interrupt would allocate
+        self._scheduled_read = self._read_from_timer
+
+    def raw(self):
+        """Return one oversampled reading in degrees, unfiltered."""
+        read = self.adc.read_u16
+        total = 0
+        for _ in range(self.samples):
+            total += read()
+        return self._base - self._step * total
+
+    def read(self):
+        """Take a reading, filter it and return the result."""
+        t = self.raw()
+        f = self.filter
+        if f == "ema":
+            if self.value is not None:
+                t = self.value + self.alpha * (t - self.value)
+        elif f is not None:
+            history = self._history
+            n = len(history)
+            if f == "average":
+                self._sum += t - history[self._pos]
+            history[self._pos] = t
+            self._pos = (self._pos + 1) % n
+            if self._count < n:
+                self._count += 1
+            if f == "average":
+                t = self._sum / self._count
+            else:
+                ordered = sorted(history[:self._count])
+                t = ordered[self._count // 2]
+        self.value = t
+        return t
+
+    def latest(self):
+        """Return the last reading without touching the ADC, None before
+        the first one."""
+        return self.value
+
+    def start(self, period=1000, timer_id=-1):
+        """Read every period ms from a hardware timer."""
+        self.stop()
+        self.read()
+        self._timer = Timer(timer_id)
+        self._timer.init(period=period, mode=Timer.PERIODIC, callback=self._on_timer)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _on_timer(self, timer):
+        # sorting and float maths allocate, run it soon after the interrupt
+        schedule(self._scheduled_read, 0)
+
+    def _read_from_timer(self, _):
+        self.read()
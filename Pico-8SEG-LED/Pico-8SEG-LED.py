@@ -1,4 +1,4 @@
-from machine import Pin,SPI,PWM
+from machine import Pin,SPI,PWM,Timer
 import framebuf
 import time
 
@@ -12,6 +12,9 @@ TENS      = 0xFB
 UNITS     = 0xF7
 Dot       = 0x80
 
+# digit select codes, left to right
+DIGITS = (KILOBIT, HUNDREDS, TENS, UNITS)
+
 SEG8Code = [
     0x3F, # 0
     0x06, # 1
@@ -30,6 +33,26 @@ SEG8Code = [
     0x79, # E
     0x71  # F
     ] 
+
+# segment codes for text(), besides the hex digits above
+MINUS = 0x40
+SEG8Chars = {
+    ' ': 0x00, '-': MINUS, '_': 0x08, '=': 0x48, '*': 0x63,  # * degree sign
+    'G': 0x3D, 'H': 0x76, 'I': 0x06, 'J': 0x1E, 'L': 0x38, 'O': 0x3F,
+    'P': 0x73, 'S': 0x6D, 'U': 0x3E, 'Y': 0x6E,
+    'c': 0x58, 'h': 0x74, 'i': 0x04, 'n': 0x54, 'o': 0x5C, 'r': 0x50,
+    't': 0x78, 'u': 0x1C,
+}
+for i, c in enumerate('0123456789AbCdEF'):
+    SEG8Chars[c] = SEG8Code[i]
+def make_frame(segments):
+    '''Precompute the full scan for four segment codes, left to right'''
+    frame = bytearray(8)
+    for i in range(4):
+        frame[2 * i] = DIGITS[i]
+        frame[2 * i + 1] = segments[i]
+    return frame
+
 class LED_8SEG():
     def __init__(self):
         self.rclk = Pin(RCLK,Pin.OUT)
@@ -38,6 +61,18 @@ class LED_8SEG():
         self.spi = SPI(1,1000_000)
         self.spi = SPI(1,10000_000,polarity=0, phase=0,sck=Pin(SCK),mosi=Pin(MOSI),miso=None)
         self.SEG8=SEG8Code
+        # one latched transfer: digit select, then segments
+        self.cmd = bytearray(2)
+        # full scan shown while scanning: the four transfers, left to right
+        self.frame = make_frame((0, 0, 0, 0))
+        mv = memoryview(self.frame)
+        self.parts = [mv[i:i + 2] for i in range(0, 8, 2)]
+        self.digit = 0
+        self.timer = None
+        # value the frame was made from, so an unchanged value is not redone
+        self.segs = bytearray(4)
+        self.kind = None
+        self.value = None
     '''
     function: Send Command
     parameter: 
@@ -46,27 +81,147 @@ class LED_8SEG():
     Info:The data transfer
     '''
     def write_cmd(self, Num, Seg):    
+        self.send(Num, Seg)
+        time.sleep(0.002)
+
+    def send(self, Num, Seg):
+        cmd = self.cmd
+        cmd[0] = Num
+        cmd[1] = Seg
+        self.spi.write(cmd)
+        self.rclk(0)
         self.rclk(1)
-        self.spi.write(bytearray([Num]))
-        self.spi.write(bytearray([Seg]))
+
+    def scan(self, frame=None, hold_us=0):
+        '''Light the four digits in turn, from frame when given (see
+        make_frame), holding each for hold_us'''
+        if frame is not None:
+            self.frame[:] = frame
+        for part in self.parts:
+            self.spi.write(part)
+            self.rclk(0)
+            self.rclk(1)
+            if hold_us:
+                time.sleep_us(hold_us)
+    '''
+    function: Scan the digits from a timer
+    parameter:
+        freq: digits lit per second, each digit is refreshed freq/4 times
+    Info:Shows whatever is in frame, so the program only updates it and
+        carries on. Both bytes latch together on RCLK, so a digit never
+        shows the segments of its neighbour.
+    '''
+    def start(self, freq=1000):
+        self.stop()
+        self.timer = Timer(freq=freq, mode=Timer.PERIODIC, callback=self.refresh)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
+
+    def show(self, segments):
+        '''Set the four digit segment codes, left to right'''
+        self.kind = None
+        self.load(segments)
+
+    def load(self, segments):
+        frame = self.frame
+        for i in range(4):
+            frame[2 * i + 1] = segments[i]
+
+    def changed(self, kind, value):
+        if kind == self.kind and value == self.value:
+            return False
+        self.kind = kind
+        self.value = value
+        return True
+
+    def number(self, num):
+        '''Show an integer -999 through 9999, right aligned'''
+        num = max(-999, min(num, 9999))
+        if not self.changed('number', num):
+            return
+        segs = self.segs
+        n = -num if num < 0 else num
+        i = 3
+        while True:
+            segs[i] = SEG8Code[n % 10]
+            n //= 10
+            i -= 1
+            if not n:
+                break
+        if num < 0:
+            segs[i] = MINUS
+            i -= 1
+        while i >= 0:
+            segs[i] = 0
+            i -= 1
+        self.load(segs)
+
+    def hex(self, val):
+        '''Show a value 0x0000 through 0xFFFF'''
+        val &= 0xFFFF
+        if not self.changed('hex', val):
+            return
+        segs = self.segs
+        for i in range(4):
+            segs[i] = SEG8Code[(val >> (12 - 4 * i)) & 0x0F]
+        self.load(segs)
+
+    def float(self, val, decimals=1):
+        '''Show val with decimals digits after the point, right aligned'''
+        if self.changed('float', (val, decimals)):
+            self.render('{:.{}f}'.format(val, decimals))
+
+    def text(self, string):
+        '''Show up to four characters, right aligned. A '.' lights the
+        point of the character before it'''
+        if self.changed('text', string):
+            self.render(string)
+
+    def render(self, string):
+        segs = self.segs
+        i = 0
+        for c in string:
+            if c == '.' and i and not segs[i - 1] & Dot:
+                segs[i - 1] |= Dot
+                continue
+            if i == 4:
+                self.kind = None
+                raise ValueError('Does not fit on four digits: %r' % string)
+            seg = SEG8Chars.get(c)
+            if seg is None:
+                seg = SEG8Chars.get(c.upper(), SEG8Chars.get(c.lower()))
+            if seg is None:
+                self.kind = None
+                raise ValueError('No segment code for %r' % c)
+            segs[i] = seg
+            i += 1
+        # right align
+        shift = 4 - i
+        for j in range(3, -1, -1):
+            segs[j] = segs[j - shift] if j >= shift else 0
+        self.load(segs)
+
+    def refresh(self, t=None):
+        '''Light the next digit, called by the timer'''
+        i = self.digit
+        self.spi.write(self.parts[i])
         self.rclk(0)
-        time.sleep(0.002)
         self.rclk(1)
+        self.digit = (i + 1) & 3
 
    
 if __name__=='__main__':
     LED = LED_8SEG()
+    LED.start()
     #color BRG
     while(1):
-        for o in range(99999):
-            time.sleep(0.0005)
-            LED.write_cmd(UNITS,LED.SEG8[o%10])
-            time.sleep(0.0005)
-            LED.write_cmd(TENS,LED.SEG8[(o%100)//10])
-            time.sleep(0.0005)
-            LED.write_cmd(HUNDREDS,LED.SEG8[(o%1000)//100]|Dot)
-            time.sleep(0.0005)
-            LED.write_cmd(KILOBIT,LED.SEG8[(o%10000)//1000])
+        for o in range(10000):
+            LED.float(o / 100, 2)
+            # the timer keeps the display lit, the loop is free until the next value
+            time.sleep(0.01)
 
                             
             
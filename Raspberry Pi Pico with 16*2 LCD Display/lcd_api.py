@@ -1,5 +1,15 @@
 import time
 
+
+def _asyncio():
+    # imported on first use so scripts without an event loop don't pay for it
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
+
 class LcdApi:
 
     LCD_CLR = 0x01              # DB0: clear display
@@ -44,6 +54,9 @@ class LcdApi:
         self.cursor_y = 0
         self.implied_newline = False
         self.backlight = True
+        # frame the caller draws into, and what the LCD is showing now
+        self.frame = [bytearray(b' ' * self.num_columns) for _ in range(self.num_lines)]
+        self.shown = [bytearray(b' ' * self.num_columns) for _ in range(self.num_lines)]
         self.display_off()
         self.backlight_on()
         self.clear()
@@ -59,6 +72,22 @@ class LcdApi:
         self.hal_write_command(self.LCD_HOME)
         self.cursor_x = 0
         self.cursor_y = 0
+        self._blank_shown()
+
+    async def clear_async(self):
+        """Like clear(), but lets other tasks run while the LCD executes
+        the slow clear and home commands.
+        """
+        await self.hal_write_command_async(self.LCD_CLR)
+        await self.hal_write_command_async(self.LCD_HOME)
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self._blank_shown()
+
+    def _blank_shown(self):
+        for line in self.shown:
+            for x in range(self.num_columns):
+                line[x] = 32
 
     def show_cursor(self):
         """Causes the cursor to be made visible."""
@@ -129,6 +158,8 @@ class LcdApi:
                 self.cursor_x = self.num_columns
         else:
             self.hal_write_data(ord(char))
+            if self.cursor_x < self.num_columns:
+                self.shown[self.cursor_y][self.cursor_x] = ord(char)
             self.cursor_x += 1
         if self.cursor_x >= self.num_columns:
             self.cursor_x = 0
@@ -142,8 +173,86 @@ class LcdApi:
         """Write the indicated string to the LCD at the current cursor
         position and advances the cursor position appropriately.
         """
-        for char in string:
-            self.putchar(char)
+        i = 0
+        n = len(string)
+        while i < n:
+            # the characters up to the end of the line or the next newline
+            # go out as one run, the LCD advances its own address for them
+            end = i
+            room = self.num_columns - self.cursor_x
+            while end < n and end - i < room and string[end] != '\n':
+                end += 1
+            if end == i:
+                self.putchar(string[i])
+                i += 1
+                continue
+            run = string[i:end]
+            self.hal_write_string(run)
+            shown = self.shown[self.cursor_y]
+            x = self.cursor_x
+            for char in run:
+                shown[x] = ord(char)
+                x += 1
+            self.cursor_x = x
+            i = end
+            if self.cursor_x >= self.num_columns:
+                self.cursor_x = 0
+                self.cursor_y += 1
+                self.implied_newline = True
+                if self.cursor_y >= self.num_lines:
+                    self.cursor_y = 0
+                self.move_to(self.cursor_x, self.cursor_y)
+
+    def write_line(self, y, text):
+        """Set line y of the frame to text, padded with spaces. Nothing is
+        sent until flush().
+        """
+        line = self.frame[y]
+        n = min(len(text), self.num_columns)
+        for x in range(n):
+            line[x] = ord(text[x])
+        for x in range(n, self.num_columns):
+            line[x] = 32
+
+    def write_at(self, x, y, text):
+        """Put text into the frame at column x of line y, leaving the rest
+        of the line alone. Nothing is sent until flush().
+        """
+        line = self.frame[y]
+        for char in text:
+            if x >= self.num_columns:
+                break
+            line[x] = ord(char)
+            x += 1
+
+    def flush(self):
+        """Send the characters of the frame that differ from what the LCD
+        shows, each run of changes with a single cursor move.
+        """
+        for y in range(self.num_lines):
+            line = self.frame[y]
+            shown = self.shown[y]
+            x = 0
+            while x < self.num_columns:
+                if line[x] == shown[x]:
+                    x += 1
+                    continue
+                start = last = x
+                while x < self.num_columns:
+                    if line[x] != shown[x]:
+                        shown[x] = line[x]
+                        last = x
+                    elif x - last > 1:
+                        # a single unchanged cell is cheaper to resend than
+                        # a cursor move, longer gaps start a new run
+                        break
+                    x += 1
+                if self.cursor_x != start or self.cursor_y != y:
+                    self.move_to(start, y)
+                self.hal_write_string(memoryview(line)[start:last + 1])
+                self.cursor_x = last + 1
+        if self.cursor_x >= self.num_columns:
+            self.move_to(0, (self.cursor_y + 1) % self.num_lines)
 
     def custom_char(self, location, charmap):
         """Write a character to one of the 8 CGRAM locations, available
@@ -151,10 +260,10 @@ class LcdApi:
         """
         location &= 0x7
         self.hal_write_command(self.LCD_CGRAM | (location << 3))
-        self.hal_sleep_us(40)
+        self.hal_wait_ready(40)
         for i in range(8):
             self.hal_write_data(charmap[i])
-            self.hal_sleep_us(40)
+            self.hal_wait_ready(40)
         self.move_to(self.cursor_x, self.cursor_y)
 
     def hal_backlight_on(self):
@@ -176,6 +285,21 @@ class LcdApi:
         """
         raise NotImplementedError
 
+    def hal_write_string(self, string):
+        """Write the characters of a string, or the bytes of a buffer, as
+        data to the LCD. A derived HAL class can implement this function
+        to send them in one go, the default writes them one at a time.
+        """
+        for char in string:
+            self.hal_write_data(char if isinstance(char, int) else ord(char))
+
+    async def hal_write_command_async(self, cmd):
+        """Write a command to the LCD, yielding instead of sleeping while
+        it executes. A derived HAL class that waits after commands should
+        implement this function, the default just blocks.
+        """
+        self.hal_write_command(cmd)
+
     def hal_write_data(self, data):
         """Write data to the LCD.
         It is expected that a derived HAL class will implement this
@@ -183,6 +307,63 @@ class LcdApi:
         """
         raise NotImplementedError
 
+    def hal_wait_ready(self, usecs):
+        """Wait until the LCD can take the next command or data, usecs
+        at most. A derived HAL class that can read the busy flag can
+        implement this to return as soon as it clears, the default sleeps.
+        """
+        self.hal_sleep_us(usecs)
+
     def hal_sleep_us(self, usecs):
         """Sleep for some time (given in microseconds)."""
         time.sleep_us(usecs)
+
+
+class GlyphCache:
+    """Map any number of named custom characters onto the 8 CGRAM slots.
+
+    glyphs maps a name to its 8 byte bitmap, as passed to custom_char().
+    char(name) returns the one character string that shows the glyph,
+    uploading it first only if it is not already in a slot, in which case
+    the least recently used glyph gives up its slot. Cells on screen still
+    showing an evicted glyph change with it, so keep at most 8 different
+    glyphs visible at a time.
+    """
+
+    def __init__(self, lcd, glyphs=None):
+        self.lcd = lcd
+        self.glyphs = dict(glyphs) if glyphs else {}
+        self._names = [None] * 8
+        self._used = [0] * 8
+        self._slot = {}
+        self._tick = 0
+
+    def define(self, name, bitmap):
+        """Add or change a glyph. A changed glyph that is resident is
+        uploaded again right away."""
+        self.glyphs[name] = bitmap
+        slot = self._slot.get(name)
+        if slot is not None:
+            self.lcd.custom_char(slot, bitmap)
+
+    def char(self, name):
+        """Return the character for glyph name, uploading it if needed."""
+        slot = self._slot.get(name)
+        if slot is None:
+            slot = 0
+            for i in range(1, 8):
+                if self._used[i] < self._used[slot]:
+                    slot = i
+            old = self._names[slot]
+            if old is not None:
+                del self._slot[old]
+            self.lcd.custom_char(slot, self.glyphs[name])
+            self._names[slot] = name
+            self._slot[name] = slot
+        self._tick += 1
+        self._used[slot] = self._tick
+        return chr(slot)
+
+    def resident(self, name):
+        """Return True if glyph name is in a slot right now."""
+        return name in self._slot
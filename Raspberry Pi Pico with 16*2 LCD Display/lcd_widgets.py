@@ -0,0 +1,191 @@
+# Widgets for HD44780 character LCDs driven through LcdApi
+#
+# Widgets draw into the LCD frame (see LcdApi.write_at) and remember what
+# they drew, so setting the same value again costs nothing and a new value
+# only touches the cells that differ once lcd.flush() sends them. Their
+# custom characters come from a shared GlyphCache:
+#
+#     glyphs = GlyphCache(lcd)
+#     temp = BigNumber(lcd, glyphs, 0, 0, 12)
+#     bar = BarGraph(lcd, glyphs, 12, 0, 4, lo=0, hi=100)
+#     temp.set("23.4")
+#     bar.set(40)
+#     lcd.flush()
+#
+# The LCD has 8 custom characters. BigNumber uses 3 of them, BarGraph 4
+# and Sparkline 7, so a Sparkline does not share the screen with the
+# other two.
+
+FULL = chr(255)  # solid block in the character ROM
+
+_BIG_GLYPHS = {
+    'big_top': bytes((0x1F, 0x1F, 0, 0, 0, 0, 0, 0)),
+    'big_bottom': bytes((0, 0, 0, 0, 0, 0, 0x1F, 0x1F)),
+    'big_both': bytes((0x1F, 0x1F, 0, 0, 0, 0, 0x1F, 0x1F)),
+}
+
+# Big characters, 3 cells wide and 2 lines high: F solid, T top bar,
+# B bottom bar, X both bars
+_BIG_FONT = {
+    '0': ('FTF', 'FBF'),
+    '1': ('TF ', 'BFB'),
+    '2': ('XXF', 'FBB'),
+    '3': ('XXF', 'BBF'),
+    '4': ('FBF', '  F'),
+    '5': ('FXX', 'BBF'),
+    '6': ('FXX', 'FBF'),
+    '7': ('TTF', '  F'),
+    '8': ('FXF', 'FBF'),
+    '9': ('FXF', 'BBF'),
+    '-': ('BBB', '   '),
+    ' ': ('   ', '   '),
+}
+_BIG_CELLS = {'T': 'big_top', 'B': 'big_bottom', 'X': 'big_both'}
+
+
+def _add_glyphs(glyphs, bitmaps):
+    for name in bitmaps:
+        if name not in glyphs.glyphs:
+            glyphs.glyphs[name] = bitmaps[name]
+
+
+class BigNumber:
+    """Digits two lines high in a box of width columns at x, y.
+
+    Each digit takes 3 columns with one of spacing between digits, a
+    decimal point takes the spacing column. Text is right aligned;
+    '0'-'9', '-', '.' and ' ' are allowed.
+    """
+
+    def __init__(self, lcd, glyphs, x, y, width):
+        self.lcd = lcd
+        self.glyphs = glyphs
+        self.x = x
+        self.y = y
+        self.width = width
+        self.text = None
+        _add_glyphs(glyphs, _BIG_GLYPHS)
+
+    def set(self, text):
+        """Draw text, a string or a number, into the frame."""
+        text = str(text)
+        if text == self.text:
+            return
+        top = []
+        bottom = []
+        after_dot = False
+        for char in text:
+            if char == '.':
+                top.append(' ')
+                bottom.append('.')
+                after_dot = True
+                continue
+            rows = _BIG_FONT.get(char)
+            if rows is None:
+                raise ValueError("Character not in big font: %r" % char)
+            if top and not after_dot:
+                # the point already separates its neighbours
+                top.append(' ')
+                bottom.append(' ')
+            after_dot = False
+            top.append(self._cells(rows[0]))
+            bottom.append(self._cells(rows[1]))
+        top = ''.join(top)
+        bottom = ''.join(bottom)
+        if len(top) > self.width:
+            raise ValueError("%r does not fit in %d columns" % (text, self.width))
+        pad = ' ' * (self.width - len(top))
+        self.lcd.write_at(self.x, self.y, pad + top)
+        self.lcd.write_at(self.x, self.y + 1, pad + bottom)
+        self.text = text
+
+    def _cells(self, row):
+        out = ''
+        for cell in row:
+            if cell == 'F':
+                out += FULL
+            elif cell == ' ':
+                out += ' '
+            else:
+                out += self.glyphs.char(_BIG_CELLS[cell])
+        return out
+
+
+class BarGraph:
+    """Horizontal bar of width cells at x, y for values from lo to hi.
+
+    Each cell shows five steps, one per pixel column.
+    """
+
+    def __init__(self, lcd, glyphs, x, y, width, lo=0, hi=100):
+        self.lcd = lcd
+        self.glyphs = glyphs
+        self.x = x
+        self.y = y
+        self.width = width
+        if hi <= lo:
+            raise ValueError("hi must be above lo")
+        self.lo = lo
+        self.hi = hi
+        self.steps = -1
+        bitmaps = {}
+        for n in range(1, 5):
+            bitmaps['bar%d' % n] = bytes(((0x1F << (5 - n)) & 0x1F,) * 8)
+        _add_glyphs(glyphs, bitmaps)
+
+    def set(self, value):
+        """Draw the bar for value, clamped to lo..hi, into the frame."""
+        total = 5 * self.width
+        steps = int((value - self.lo) * total / (self.hi - self.lo) + 0.5)
+        steps = min(max(steps, 0), total)
+        if steps == self.steps:
+            return
+        full, part = divmod(steps, 5)
+        text = FULL * full
+        if part:
+            text += self.glyphs.char('bar%d' % part)
+        self.lcd.write_at(self.x, self.y, text + ' ' * (self.width - len(text)))
+        self.steps = steps
+
+
+class Sparkline:
+    """History of the last width values at x, y, one cell per value.
+
+    Each value is drawn as a column of 0 to 8 pixels between lo and hi,
+    the newest on the right.
+    """
+
+    def __init__(self, lcd, glyphs, x, y, width, lo=0, hi=100):
+        self.lcd = lcd
+        self.glyphs = glyphs
+        self.x = x
+        self.y = y
+        self.width = width
+        if hi <= lo:
+            raise ValueError("hi must be above lo")
+        self.lo = lo
+        self.hi = hi
+        self.levels = bytearray(width)
+        bitmaps = {}
+        for n in range(1, 8):
+            bitmaps['spark%d' % n] = bytes(8 - n) + bytes((0x1F,) * n)
+        _add_glyphs(glyphs, bitmaps)
+
+    def push(self, value):
+        """Add value on the right, scroll the rest left and draw it into
+        the frame."""
+        level = int((value - self.lo) * 8 / (self.hi - self.lo) + 0.5)
+        level = min(max(level, 0), 8)
+        levels = self.levels
+        for i in range(self.width - 1):
+            levels[i] = levels[i + 1]
+        levels[-1] = level
+        text = ''
+        for level in levels:
+            if level == 0:
+                text += ' '
+            elif level == 8:
+                text += FULL
+            else:
+                text += self.glyphs.char('spark%d' % level)
+        self.lcd.write_at(self.x, self.y, text)
@@ -7,11 +7,10 @@ i2c = machine.I2C(id=1, scl=machine.Pin(27), sda=machine.Pin(26), freq=100000)
 lcd = I2cLcd(i2c, 0x27, 2, 16)  # LCD 16x2
 
 while True:
-    lcd.putstr('Scemina...')
+    lcd.write_line(0, 'Scemina...')
+    lcd.flush()
     utime.sleep(2)
-    lcd.clear()
-    lcd.move_to(3, 0)
-    lcd.putstr('I Love U!')
+    lcd.write_line(0, '   I Love U!')
+    lcd.flush()
     utime.sleep(2)
-    lcd.clear()
     # lcd.display_on()
@@ -1,6 +1,6 @@
-from lcd_api import LcdApi
+from lcd_api import LcdApi, _asyncio
 from machine import I2C
-from time import sleep_ms
+from time import sleep_ms, sleep_us, ticks_diff, ticks_us
 
 DEFAULT_I2C_ADDR = 0x27
 
@@ -12,13 +12,32 @@ MASK_E = 0x04
 SHIFT_BACKLIGHT = 3
 SHIFT_DATA = 4
 
+# characters sent per I2C transaction by hal_write_string, 4 bytes each
+STRING_CHUNK = 40
+
 
 class I2cLcd(LcdApi):
-    """Implements a character based lcd connected via PCF8574 on i2c."""
+    """Implements a character based lcd connected via PCF8574 on i2c.
+
+    With busy_poll=True the driver reads the busy flag back over the
+    PCF8574 instead of sleeping the worst case time after clear, home and
+    the like. This needs the LCD R/W pin on the expander, as on the usual
+    backpacks. The flag is checked once while the LCD is known to be idle
+    and the driver keeps the timed delays if it does not read back clear.
+    """
 
-    def __init__(self, i2c, i2c_addr, num_lines, num_columns):
+    def __init__(self, i2c, i2c_addr, num_lines, num_columns, busy_poll=False):
         self.i2c = i2c
         self.i2c_addr = i2c_addr
+        self.busy_poll = busy_poll
+        # E high/E low for both nibbles of one byte
+        self.buf = bytearray(4)
+        self.string_buf = bytearray(4 * STRING_CHUNK)
+        self.string_mv = memoryview(self.string_buf)
+        # E high for the busy flag nibble, then E low/high/low for the other
+        self.poll_buf = bytearray(4)
+        self.poll_mv = memoryview(self.poll_buf)
+        self.flag = bytearray(1)
         self.i2c.writeto(self.i2c_addr, bytearray([0]))
         sleep_ms(20)   # Allow LCD time to powerup
         # Send reset 3 times
@@ -31,6 +50,12 @@ class I2cLcd(LcdApi):
         # Put LCD into 4 bit mode
         self.hal_write_init_nibble(self.LCD_FUNCTION)
         sleep_ms(1)
+        if busy_poll:
+            # The LCD is idle now, so a set flag means R/W is not wired. The
+            # reads then latch as a stray command, which the clear() in
+            # LcdApi.__init__ undoes. The backlight stays off until then.
+            self.backlight = False
+            self.busy_poll = not self._busy()
         LcdApi.__init__(self, num_lines, num_columns)
         cmd = self.LCD_FUNCTION
         if num_lines > 1:
@@ -57,21 +82,91 @@ class I2cLcd(LcdApi):
         """Writes a command to the LCD.
         Data is latched on the falling edge of E.
         """
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | (((cmd >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | ((cmd & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        self._write_command(cmd)
         if cmd <= 3:
             # The home and clear commands require a worst case delay of 4.1 msec
-            sleep_ms(5)
+            self.hal_wait_ready(5000)
+
+    async def hal_write_command_async(self, cmd):
+        """Writes a command to the LCD, yielding during the delay."""
+        self._write_command(cmd)
+        if cmd <= 3:
+            asyncio = _asyncio()
+            if self.busy_poll:
+                start = ticks_us()
+                while self._busy() and ticks_diff(ticks_us(), start) < 5000:
+                    await asyncio.sleep_ms(0)
+            else:
+                await asyncio.sleep_ms(5)
+
+    def hal_wait_ready(self, usecs):
+        """Poll the busy flag for up to usecs, or sleep without busy_poll.
+        A poll costs a few I2C transfers, longer than the next write takes
+        to reach the LCD, so short waits are left to the bus.
+        """
+        if not self.busy_poll:
+            sleep_us(usecs)
+        elif usecs > 100:
+            # bounded by the timed delay in case the flag reads back stuck
+            start = ticks_us()
+            while self._busy() and ticks_diff(ticks_us(), start) < usecs:
+                pass
+
+    def _busy(self):
+        # The data pins must be high for the PCF8574 to let the LCD drive
+        # them; the flag is bit 7 of the first nibble read with E high
+        buf = self.poll_buf
+        byte = 0xf0 | MASK_RW | (self.backlight << SHIFT_BACKLIGHT)
+        buf[0] = byte | MASK_E
+        buf[1] = byte
+        buf[2] = byte | MASK_E
+        buf[3] = byte
+        self.i2c.writeto(self.i2c_addr, self.poll_mv[:1])
+        self.i2c.readfrom_into(self.i2c_addr, self.flag)
+        self.i2c.writeto(self.i2c_addr, self.poll_mv[1:])
+        return self.flag[0] & 0x80
+
+    def _write_command(self, cmd):
+        self._write_byte(self.backlight << SHIFT_BACKLIGHT, cmd)
 
     def hal_write_data(self, data):
         """Write data to the LCD."""
-        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | (((data >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | ((data & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        self._write_byte(MASK_RS | (self.backlight << SHIFT_BACKLIGHT), data)
+
+    def hal_write_string(self, string):
+        """Write a string or buffer to the LCD in as few I2C transactions
+        as possible.
+        The PCF8574 updates its outputs after every byte, so the E pulses
+        for many characters can follow each other in one transaction. At
+        its 100 kHz bus limit that still leaves the LCD well over the 37 us
+        it needs per character.
+        """
+        buf = self.string_buf
+        mode = MASK_RS | (self.backlight << SHIFT_BACKLIGHT)
+        i = 0
+        for data in string:
+            if not isinstance(data, int):
+                data = ord(data)
+            byte = mode | (((data >> 4) & 0x0f) << SHIFT_DATA)
+            buf[i] = byte | MASK_E
+            buf[i + 1] = byte
+            byte = mode | ((data & 0x0f) << SHIFT_DATA)
+            buf[i + 2] = byte | MASK_E
+            buf[i + 3] = byte
+            i += 4
+            if i == len(buf):
+                self.i2c.writeto(self.i2c_addr, buf)
+                i = 0
+        if i:
+            self.i2c.writeto(self.i2c_addr, self.string_mv[:i])
+
+    def _write_byte(self, mode, value):
+        # Data is latched on the falling edge of E, high nibble first
+        buf = self.buf
+        byte = mode | (((value >> 4) & 0x0f) << SHIFT_DATA)
+        buf[0] = byte | MASK_E
+        buf[1] = byte
+        byte = mode | ((value & 0x0f) << SHIFT_DATA)
+        buf[2] = byte | MASK_E
+        buf[3] = byte
+        self.i2c.writeto(self.i2c_addr, buf)
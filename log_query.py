@@ -0,0 +1,287 @@
+"""
+Query temperature logs written by temp_log.py
+
+Run this on a PC, not on the board. It needs NumPy (pip install numpy)
+and takes any number of log directories copied off the boards:
+
+    python log_query.py temps
+    python log_query.py boards/* --start 2024-01-01 --end 2024-02-01 -p 50 -p 95
+
+Every segment file is split into blocks of up to BLOCK records, and each
+block is summarised once (time span, count, min, max, sum). The
+summaries are cached in a .log_query.npz file in each directory and only
+redone for segments that changed. Min/max/mean over a time window come
+from the summaries of the blocks inside it; the records themselves are
+memory-mapped and read only for the blocks the window cuts through, or
+when percentiles are asked for.
+"""
+
+import argparse
+import datetime
+import os
+import struct
+import sys
+
+MAGIC = b"TLOG"
+VERSION = 2
+HEADER = "<4sHHI"
+HEADER_SIZE = 12
+RECORD_SIZE = 6
+
+# records summarised together, a segment from the board is one block
+BLOCK = 4096
+CACHE = ".log_query.npz"
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        sys.exit("log_query.py needs NumPy: pip install numpy")
+    return numpy
+
+
+def _dtypes(np):
+    record = np.dtype([("t", "<u4"), ("v", "<i2")])
+    summary = np.dtype(
+        [
+            ("file", "<u4"), ("start", "<u4"), ("stop", "<u4"), ("scale", "<u2"),
+            ("t_min", "<u4"), ("t_max", "<u4"), ("v_min", "<i2"), ("v_max", "<i2"),
+            ("v_sum", "<i8"),
+        ]
+    )
+    return record, summary
+
+
+class LogDir:
+    """The segments of one log directory, with per-block summaries."""
+
+    def __init__(self, path, cache=True):
+        np = _numpy()
+        self.path = path
+        self._record, summary = _dtypes(np)
+        self.names = sorted(n for n in os.listdir(path) if n.endswith(".log"))
+        self._maps = {}
+
+        known = self._load_cache() if cache else {}
+        stats = []
+        blocks = []
+        changed = False
+        for i, name in enumerate(self.names):
+            st = os.stat(os.path.join(path, name))
+            stats.append((st.st_size, st.st_mtime_ns))
+            rows = known.get((name, st.st_size, st.st_mtime_ns))
+            if rows is None:
+                rows = self._summarise(i)
+                changed = True
+            else:
+                rows = rows.copy()
+                rows["file"] = i
+            blocks.append(rows)
+        self.blocks = np.concatenate(blocks) if blocks else np.zeros(0, summary)
+        if cache and (changed or len(known) != len(self.names)):
+            self._save_cache(stats)
+
+    def _load_cache(self):
+        np = _numpy()
+        try:
+            with np.load(os.path.join(self.path, CACHE)) as data:
+                names = data["names"]
+                sizes = data["sizes"]
+                mtimes = data["mtimes"]
+                blocks = data["blocks"]
+        except (OSError, KeyError, ValueError):
+            return {}
+        known = {}
+        for i, name in enumerate(names):
+            known[(str(name), int(sizes[i]), int(mtimes[i]))] = blocks[blocks["file"] == i]
+        return known
+
+    def _save_cache(self, stats):
+        np = _numpy()
+        try:
+            with open(os.path.join(self.path, CACHE), "wb") as f:
+                np.savez(
+                    f,
+                    names=np.array(self.names, dtype=str),
+                    sizes=np.array([s[0] for s in stats], dtype=np.int64),
+                    mtimes=np.array([s[1] for s in stats], dtype=np.int64),
+                    blocks=self.blocks,
+                )
+        except OSError:
+            pass  # read-only copy, summaries are redone next time
+
+    def _map(self, i):
+        # (records, scale) of segment i, mapped on first use
+        entry = self._maps.get(i)
+        if entry is None:
+            np = _numpy()
+            name = os.path.join(self.path, self.names[i])
+            with open(name, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            n = (os.path.getsize(name) - HEADER_SIZE) // RECORD_SIZE
+            if len(header) < HEADER_SIZE or n <= 0:
+                entry = (np.zeros(0, self._record), 1)
+            else:
+                magic, version, scale, _ = struct.unpack(HEADER, header)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError("{}: not a log segment".format(name))
+                records = np.memmap(
+                    name, dtype=self._record, mode="r", offset=HEADER_SIZE, shape=(n,)
+                )
+                entry = (records, scale)
+            self._maps[i] = entry
+        return entry
+
+    def _summarise(self, i):
+        np = _numpy()
+        records, scale = self._map(i)
+        n = len(records)
+        rows = np.zeros((n + BLOCK - 1) // BLOCK, _dtypes(np)[1])
+        for b, start in enumerate(range(0, n, BLOCK)):
+            chunk = np.asarray(records[start : start + BLOCK])
+            t = chunk["t"]
+            v = chunk["v"]
+            rows[b] = (
+                i, start, start + len(chunk), scale,
+                t.min(), t.max(), v.min(), v.max(), v.sum(dtype=np.int64),
+            )
+        return rows
+
+    def __len__(self):
+        return int((self.blocks["stop"] - self.blocks["start"]).sum())
+
+    def span(self):
+        """Return the (first, last) timestamp in the log."""
+        if not len(self.blocks):
+            return None
+        return int(self.blocks["t_min"].min()), int(self.blocks["t_max"].max())
+
+    def _split(self, start, end):
+        # blocks entirely inside the window, and blocks it cuts through
+        b = self.blocks
+        inside = (b["t_min"] >= start) & (b["t_max"] <= end)
+        partial = (b["t_max"] >= start) & (b["t_min"] <= end) & ~inside
+        return inside, partial
+
+    def _values(self, row, start, end, masked):
+        records, _ = self._map(int(row["file"]))
+        chunk = records[int(row["start"]) : int(row["stop"])]
+        if not masked:
+            return chunk["v"]
+        t = chunk["t"]
+        return chunk["v"][(t >= start) & (t <= end)]
+
+    def summary(self, start, end):
+        """Return (count, min, max, sum) of the readings in the window."""
+        np = _numpy()
+        inside, partial = self._split(start, end)
+        b = self.blocks[inside]
+        count = int((b["stop"] - b["start"]).sum())
+        lo = list(b["v_min"] / b["scale"])
+        hi = list(b["v_max"] / b["scale"])
+        total = float((b["v_sum"] / b["scale"]).sum())
+        for row in self.blocks[partial]:
+            values = self._values(row, start, end, True)
+            if len(values):
+                count += len(values)
+                lo.append(values.min() / row["scale"])
+                hi.append(values.max() / row["scale"])
+                total += values.sum(dtype=np.int64) / row["scale"]
+        if not count:
+            return 0, None, None, 0.0
+        return count, float(min(lo)), float(max(hi)), total
+
+    def values(self, start, end):
+        """Return the readings in the window, in no particular order."""
+        np = _numpy()
+        inside, partial = self._split(start, end)
+        parts = [np.zeros(0)]
+        for row in self.blocks[inside]:
+            parts.append(self._values(row, start, end, False) / row["scale"])
+        for row in self.blocks[partial]:
+            parts.append(self._values(row, start, end, True) / row["scale"])
+        return np.concatenate(parts)
+
+
+def query(logs, start=None, end=None, percentiles=()):
+    """Aggregate the readings of all logs between start and end, in
+    seconds, both included. Returns a dict with count, min, max, mean and
+    one "p<n>" entry per requested percentile."""
+    np = _numpy()
+    # timestamps are u32
+    start = 0 if start is None else max(start, 0)
+    end = 0xFFFFFFFF if end is None else min(end, 0xFFFFFFFF)
+    count = 0
+    lo = []
+    hi = []
+    total = 0.0
+    for log in logs:
+        n, vmin, vmax, vsum = log.summary(start, end)
+        if n:
+            count += n
+            lo.append(vmin)
+            hi.append(vmax)
+            total += vsum
+    result = {"count": count}
+    if not count:
+        return result
+    result["min"] = min(lo)
+    result["max"] = max(hi)
+    result["mean"] = total / count
+    if percentiles:
+        values = np.concatenate([log.values(start, end) for log in logs])
+        for p, value in zip(percentiles, np.percentile(values, percentiles)):
+            result["p{:g}".format(p)] = float(value)
+    return result
+
+
+def _parse_time(text):
+    """Seconds since the epoch, or an ISO date/time taken as UTC."""
+    try:
+        return int(text)
+    except ValueError:
+        moment = datetime.datetime.fromisoformat(text)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=datetime.timezone.utc)
+        return int(moment.timestamp())
+
+
+def _format_time(seconds):
+    moment = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("logs", nargs="+", help="log directories copied from the boards")
+    parser.add_argument("--start", type=_parse_time, help="epoch seconds or ISO date")
+    parser.add_argument("--end", type=_parse_time, help="epoch seconds or ISO date")
+    parser.add_argument(
+        "-p", "--percentile", type=float, action="append", default=[], help="repeatable"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write summaries")
+    args = parser.parse_args()
+
+    logs = [LogDir(path, cache=not args.no_cache) for path in args.logs]
+    for log in logs:
+        span = log.span()
+        if span:
+            print(
+                "{}: {} readings, {} to {}".format(
+                    log.path, len(log), _format_time(span[0]), _format_time(span[1])
+                )
+            )
+        else:
+            print("{}: empty".format(log.path))
+    result = query(logs, args.start, args.end, args.percentile)
+    if not result["count"]:
+        print("no readings in the window")
+        return
+    print("{:>6}: {}".format("count", result.pop("count")))
+    for key, value in result.items():
+        print("{:>6}: {:.2f}".format(key, value))
+
+
+if __name__ == "__main__":
+    main()
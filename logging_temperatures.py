@@ -1,26 +1,21 @@
-# LOGGING TEMPERATURES TO A TEXT FILE
-import machine
+# LOGGING TEMPERATURES TO A RING OF BINARY FILES
+from temp_sensor import TempSensor
+from temp_log import TempLog
 import utime
 
-sensor_temp = machine.ADC(4)
-
-convertion_factor = 3.3 / (65535)
-# reading = sensor_temp.read_u16() * convertion_factor
-# temperature = (27 - (reading - 0.706) / 0.001721)
-
-file = open("temps.txt", "w")
+sensor = TempSensor(filter="average", window=6)
+# 128 FILES OF 4 KB IN temps/, 6 BYTES PER READING: ABOUT TWO MONTHS AT ONE A MINUTE
+# THE LOG CARRIES ON WHERE IT LEFT OFF AFTER A RESET
+log = TempLog("temps")
 
 while True:
-    reading = sensor_temp.read_u16() * convertion_factor
-    temperature = (27 - (reading - 0.706) / 0.001721)
-    file.write(str(temperature) + "\n")
-    file.flush()  # USE THIS INSTEAD OF file.close()
-    utime.sleep(10)  # LOGS TEMPERATURES EACH 10 SECONDS
-
-# TO READ FILE:
-# USE file = open("filename.txt", "r"), file.read()
+    # READ EVERY 10 SECONDS, LOG THE AVERAGE OF THE LAST MINUTE
+    for _ in range(6):
+        temperature = sensor.read()
+        utime.sleep(10)
+    log.append(temperature)  # WRITTEN TO FLASH EVERY 85 READINGS
 
-# TO READ THE FILE:
-# file = open("temps.txt", "r")
-# print(file.read())
-# file.close()
+# TO READ THE LOG ON THE BOARD:
+# for t, temperature in log.records():
+#     print(t, temperature)
+# OR COPY THE temps FOLDER TO A PC AND USE log_query.py
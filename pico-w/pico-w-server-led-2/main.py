@@ -3,6 +3,7 @@ import socket
 import utime
 import network
 import time
+from temp_sensor import TempSensor
 
 wlan = network.WLAN(network.STA_IF)
 wlan.active(True)
@@ -31,13 +32,13 @@ else:
     print("IP: ", ip)
 
 # Temperature Sensor
-sensor_temp = machine.ADC(4)
-conversion_factor = 3.3 / (65535)
+# scaled to 27 - (volts - 0.706) / slope / 8 as before: gain divides the
+# whole reading by 8, offset puts 27 back
+sensor = TempSensor(gain=1 / 8, offset=27 * 7 / 8)
 
 
 def temperature():
-    temperature_value = sensor_temp.read_u16() * conversion_factor
-    temperature_Celsius = 27 - (temperature_value - 0.706) / 0.00172169 / 8
+    temperature_Celsius = sensor.read()
     print(temperature_Celsius)
     utime.sleep(2)
     return temperature_Celsius
@@ -6,6 +6,7 @@ import urequests as requests
 import time
 from secrets import secrets
 import socket
+from temp_sensor import TempSensor
 
 # Set country to avoid possible errors
 rp2.country("IT")
@@ -78,8 +79,7 @@ s.listen(1)
 print("Listening on", addr)
 
 # Read Onboard Temperature Sensor
-sensor_temp = machine.ADC(4)
-conversion_factor = 3.3 / (65535)
+sensor = TempSensor()
 
 # Listen for connections
 while True:
@@ -102,9 +102,8 @@ while True:
             print("LED OFF")
             led.value(0)
 
-        # convert detected values from temperature sensor to actual celsius values
-        reading = sensor_temp.read_u16() * conversion_factor
-        temperature = 27 - (reading - 0.706) / 0.001721
+        # read the temperature sensor in celsius
+        temperature = sensor.read()
         # print(temperature)
         # time.sleep(1)
 
@@ -0,0 +1,81 @@
+"""
+Host-side simulation of the MicroPython HAL used by the scripts here.
+
+Call ``sim.install()`` before loading a driver and the ``machine``,
+``micropython``, ``framebuf`` and ``utime`` imports resolve to pure Python
+fakes. Every bus transaction is recorded in ``sim.log`` with a timestamp
+from the virtual clock ``sim.clock``, which sleeps and transfers advance
+according to the configured I2C ``freq`` and SPI ``baudrate``::
+
+    import sim
+    sim.install()
+    from machine import I2C
+    ssd1306 = sim.load("OLED Display/lib/ssd1306.py")
+
+    oled = ssd1306.SSD1306_I2C(128, 64, I2C(0, freq=400_000))
+    sim.log.clear()
+    oled.text("hello", 0, 0)
+    oled.show()
+    print(sim.log.summary())  # (transactions, bytes, bus time in us)
+
+``python -m sim.bench`` runs the display drivers against the fakes and
+prints bytes on wire and projected frame times.
+"""
+
+import importlib.util
+import os
+import sys
+
+from ._core import clock, log
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def install():
+    """Register the fake modules and add the MicroPython time helpers."""
+    from . import framebuf, machine, micropython, utime
+
+    sys.modules["machine"] = machine
+    sys.modules["micropython"] = micropython
+    sys.modules["framebuf"] = framebuf
+    sys.modules["utime"] = utime
+
+    import time
+
+    for name in ("sleep_ms", "sleep_us", "ticks_ms", "ticks_us", "ticks_add", "ticks_diff"):
+        setattr(time, name, getattr(utime, name))
+
+    import asyncio
+
+    if not hasattr(asyncio, "sleep_ms"):
+
+        async def sleep_ms(ms):
+            await asyncio.sleep(ms / 1000)
+
+        asyncio.sleep_ms = sleep_ms
+
+
+def reset():
+    """Rewind the virtual clock and drop recorded transactions and timers."""
+    clock.now_us = 0
+    clock.timers.clear()
+    log.clear()
+
+
+def load(path, name=None):
+    """Import a driver by path relative to the repository root.
+
+    The script folders contain spaces and are not packages, so drivers are
+    loaded from their file and registered under their module name, which
+    lets sibling imports such as ``from lcd_api import LcdApi`` resolve.
+    """
+    path = os.path.join(_ROOT, path)
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    folder = os.path.dirname(path)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,78 @@
+# Virtual clock and bus transaction log shared by the simulated modules
+
+from collections import namedtuple
+
+Transaction = namedtuple(
+    "Transaction", ("start_us", "duration_us", "bus", "kind", "addr", "data")
+)
+
+
+class Clock:
+    """Virtual microsecond clock.
+
+    Sleeps and bus transfers advance it instead of waiting, so a driver
+    run on the host finishes at once but still reports the time it would
+    have spent on the device. Periodic timers fire as the clock passes
+    their deadlines.
+    """
+
+    def __init__(self):
+        self.now_us = 0
+        self.timers = []
+        self._firing = False
+
+    def advance(self, us):
+        target = self.now_us + max(0, int(us))
+        if self._firing:
+            # a timer callback that sleeps only moves time forward
+            self.now_us = target
+            return
+        while True:
+            due = [t for t in self.timers if t._deadline_us <= target]
+            if not due:
+                break
+            timer = min(due, key=lambda t: t._deadline_us)
+            self.now_us = max(self.now_us, timer._deadline_us)
+            self._firing = True
+            try:
+                timer._fire()
+            finally:
+                self._firing = False
+        self.now_us = max(self.now_us, target)
+
+
+class BusLog:
+    """Timestamped record of every simulated bus transaction."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.transactions = []
+        self.enabled = True
+
+    def record(self, bus, kind, addr, data, duration_us):
+        start = self.clock.now_us
+        if self.enabled:
+            self.transactions.append(
+                Transaction(start, duration_us, bus, kind, addr, bytes(data))
+            )
+        self.clock.advance(duration_us)
+
+    def clear(self):
+        self.transactions.clear()
+
+    def summary(self, bus=None):
+        """Return (transactions, bytes on wire, bus time in us)."""
+        count = 0
+        nbytes = 0
+        busy = 0.0
+        for t in self.transactions:
+            if bus is not None and t.bus != bus:
+                continue
+            count += 1
+            nbytes += len(t.data)
+            busy += t.duration_us
+        return count, nbytes, busy
+
+
+clock = Clock()
+log = BusLog(clock)
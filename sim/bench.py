@@ -0,0 +1,96 @@
+"""
+Run the display drivers against the simulated HAL and report bus cost.
+
+    python -m sim.bench
+
+For every scenario it prints the bus transactions, the bytes on the wire,
+the modelled bus time and the total virtual time including the drivers'
+own sleeps, i.e. the projected frame time on the device.
+"""
+
+import sim
+
+sim.install()
+
+from machine import I2C, SPI, Pin  # noqa: E402
+
+
+def measure(name, fn, bus=None):
+    sim.log.clear()
+    start = sim.clock.now_us
+    fn()
+    count, nbytes, busy = sim.log.summary(bus)
+    elapsed = sim.clock.now_us - start
+    print(
+        "{:<40} {:>6} {:>8} {:>10.2f} {:>10.2f}".format(
+            name, count, nbytes, busy / 1000, elapsed / 1000
+        )
+    )
+
+
+def bench_ssd1306():
+    ssd1306 = sim.load("OLED Display/lib/ssd1306.py", "ssd1306")
+    for freq in (100_000, 400_000):
+        i2c = I2C(0, freq=freq)
+        label = "ssd1306 i2c {}k".format(freq // 1000)
+        holder = {}
+        measure(label + " init", lambda: holder.setdefault("d", ssd1306.SSD1306_I2C(128, 64, i2c)))
+        oled = holder["d"]
+
+        def full():
+            oled.fill(1)
+            oled.show()
+
+        def text():
+            oled.text("23.4 C", 40, 24)
+            oled.show()
+
+        measure(label + " full frame", full, "i2c0")
+        measure(label + " one string", text, "i2c0")
+
+        diffed = ssd1306.SSD1306_I2C(128, 64, i2c, diff=True)
+
+        def redraw(value):
+            diffed.fill(0)
+            diffed.text("{:.1f} C".format(value), 40, 24)
+            diffed.show()
+
+        redraw(23.4)
+        measure(label + " diff redraw, 1 digit", lambda: redraw(23.5), "i2c0")
+
+    spi = SPI(1, baudrate=10_000_000)
+    oled = ssd1306.SSD1306_SPI(128, 64, spi, Pin(20), Pin(21), Pin(22))
+
+    def full_spi():
+        oled.fill(1)
+        oled.show()
+
+    measure("ssd1306 spi 10M full frame", full_spi, "spi1")
+
+
+def bench_tm1637():
+    tm1637 = sim.load("4-digit-display/tm1637.py")
+    tm = tm1637.TM1637(clk=Pin(2), dio=Pin(3))
+    measure("tm1637 number", lambda: tm.number(1234))
+    measure("tm1637 numbers", lambda: tm.numbers(12, 34))
+
+
+def bench_lcd():
+    pico_i2c_lcd = sim.load("Raspberry Pi Pico with 16*2 LCD Display/pico_i2c_lcd.py")
+    i2c = I2C(1, freq=100_000)
+    lcd = pico_i2c_lcd.I2cLcd(i2c, 0x27, 2, 16)
+    measure("hd44780 i2c 100k clear", lcd.clear, "i2c1")
+    measure("hd44780 i2c 100k putstr 16", lambda: lcd.putstr("Temp: 23.4 C    "), "i2c1")
+
+
+def main():
+    print(
+        "{:<40} {:>6} {:>8} {:>10} {:>10}".format("scenario", "xfers", "bytes", "bus ms", "total ms")
+    )
+    bench_ssd1306()
+    bench_tm1637()
+    bench_lcd()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Device models that decode what the drivers put on a simulated bus
+
+# SSD1306 commands followed by argument bytes, with their argument count
+_SSD1306_ARGS = {
+    0x20: 1, 0x21: 2, 0x22: 2, 0x26: 6, 0x27: 6, 0x29: 5, 0x2A: 5,
+    0x81: 1, 0x8D: 1, 0xA3: 2, 0xA8: 1, 0xD3: 1, 0xD5: 1, 0xD9: 1,
+    0xDA: 1, 0xDB: 1,
+}
+
+
+class SSD1306Model:
+    """SSD1306 controller in horizontal addressing mode.
+
+    Attach it to a simulated I2C bus with ``i2c.attach(0x3C, model)`` and
+    ``ram`` holds the 8 x 128 byte display RAM as the driver left it.
+    ``commands`` lists every decoded command with its arguments.
+    """
+
+    def __init__(self):
+        self.ram = bytearray(8 * 128)
+        self.commands = []
+        self.start_line = 0
+        self.scrolling = False
+        self._col = (0, 127)
+        self._page = (0, 7)
+        self._x = 0
+        self._p = 0
+        self._pending = None
+
+    def write(self, data):
+        i = 0
+        while i < len(data):
+            control = data[i]
+            i += 1
+            if control & 0x80:
+                # Co=1: one byte, then another control byte
+                if i < len(data):
+                    self._byte(control & 0x40, data[i])
+                i += 1
+                continue
+            for b in data[i:]:
+                self._byte(control & 0x40, b)
+            break
+
+    def _byte(self, is_data, b):
+        if is_data:
+            self.ram[self._p * 128 + self._x] = b
+            if self._x < self._col[1]:
+                self._x += 1
+            else:
+                self._x = self._col[0]
+                self._p = self._p + 1 if self._p < self._page[1] else self._page[0]
+            return
+        if self._pending is not None:
+            self._pending.append(b)
+            if len(self._pending) > _SSD1306_ARGS[self._pending[0]]:
+                self._command(tuple(self._pending))
+                self._pending = None
+            return
+        if b in _SSD1306_ARGS:
+            self._pending = [b]
+        else:
+            self._command((b,))
+
+    def _command(self, cmd):
+        self.commands.append(cmd)
+        op = cmd[0]
+        if op == 0x21:
+            self._col = (cmd[1] & 0x7F, cmd[2] & 0x7F)
+            self._x = self._col[0]
+        elif op == 0x22:
+            self._page = (cmd[1] & 7, cmd[2] & 7)
+            self._p = self._page[0]
+        elif 0x40 <= op <= 0x7F:
+            self.start_line = op & 0x3F
+        elif op == 0x2E:
+            self.scrolling = False
+        elif op == 0x2F:
+            self.scrolling = True
+
+    def frame(self, width=128, height=64):
+        """Return the RAM window a width x height panel shows."""
+        x0 = 32 if width == 64 else 0
+        out = bytearray()
+        for page in range(height // 8):
+            out += self.ram[page * 128 + x0 : page * 128 + x0 + width]
+        return bytes(out)
+
+
+class TM1637Model:
+    """TM1637 decoded from the CLK and DIO pin writes in the bus log.
+
+    Call ``feed(sim.log.transactions)`` after driving the pins; ``frames``
+    then lists each start-to-stop transfer as a list of bytes and
+    ``registers`` / ``control`` hold the digit RAM and display control as
+    the chip would have latched them.
+    """
+
+    def __init__(self, clk, dio):
+        self.clk_id = clk
+        self.dio_id = dio
+        self.frames = []
+        self.registers = bytearray(6)
+        self.control = None
+        self._clk = 1
+        self._dio = 1
+        self._bits = None
+
+    def feed(self, transactions):
+        for t in transactions:
+            if t.bus != "pin" or t.addr not in (self.clk_id, self.dio_id):
+                continue
+            value = t.data[0]
+            if t.addr == self.dio_id:
+                if self._clk and self._dio and not value:
+                    self._bits = []  # start condition
+                elif self._clk and not self._dio and value and self._bits is not None:
+                    self._end_frame()
+                self._dio = value
+            else:
+                if value and not self._clk and self._bits is not None:
+                    self._bits.append(self._dio)  # sampled on the rising edge
+                self._clk = value
+
+    def _end_frame(self):
+        bits = self._bits
+        self._bits = None
+        frame = []
+        for i in range(0, len(bits) - 8, 9):  # 8 data bits, LSB first, then ACK
+            frame.append(sum(b << n for n, b in enumerate(bits[i : i + 8])))
+        if not frame:
+            return
+        self.frames.append(frame)
+        cmd = frame[0]
+        if cmd & 0xC0 == 0xC0:
+            addr = cmd & 0x07
+            for b in frame[1:]:
+                if addr < 6:
+                    self.registers[addr] = b
+                addr += 1
+        elif cmd & 0xC0 == 0x80:
+            self.control = cmd
+
+
+class HD44780Model:
+    """HD44780 character LCD behind a PCF8574 I2C expander.
+
+    Attach it with ``i2c.attach(0x27, model)``. Every byte written sets the
+    expander pins; the falling edge of E latches a nibble. ``line(y)``
+    returns the text of a display line, ``cgram`` the custom characters.
+    Reads return the busy flag, which stays set for ``busy_reads`` polls
+    after each clear or home.
+    """
+
+    def __init__(self, num_lines=2, num_columns=16, busy_reads=0):
+        self.num_lines = num_lines
+        self.num_columns = num_columns
+        self.busy_reads = busy_reads
+        self.ddram = bytearray(b" " * 0x80)
+        self.cgram = bytearray(64)
+        self.commands = []
+        self.data_writes = 0
+        self._pins = 0
+        self._four_bit = False
+        self._high = None
+        self._addr = 0
+        self._cg = False
+        self._busy = 0
+        self._read_nibble = 0
+
+    def write(self, data):
+        for b in data:
+            if self._pins & 0x04 and not b & 0x04:
+                self._latch(self._pins)
+            elif b & 0x04 and not self._pins & 0x04 and b & 0x02:
+                self._read_nibble ^= 1
+            self._pins = b
+
+    def read(self, n):
+        out = self._pins & 0x0F
+        if self._pins & 0x02 and self._pins & 0x04:
+            if self._read_nibble:
+                # first nibble of a read: busy flag and address bits 6-4
+                busy = 1 if self._busy > 0 else 0
+                if self._busy > 0:
+                    self._busy -= 1
+                out |= (busy << 7) | ((self._addr >> 4) & 0x07) << 4
+            else:
+                out |= (self._addr & 0x0F) << 4
+        else:
+            out |= 0xF0
+        return bytes((out,)) * n
+
+    def _latch(self, pins):
+        if pins & 0x02:
+            return  # read cycle
+        nibble = pins >> 4
+        rs = pins & 0x01
+        if not self._four_bit:
+            value = nibble << 4
+        elif self._high is None:
+            self._high = nibble
+            return
+        else:
+            value = self._high << 4 | nibble
+            self._high = None
+        if rs:
+            self._data(value)
+        else:
+            self._command(value)
+
+    def _command(self, cmd):
+        self.commands.append(cmd)
+        if cmd & 0x80:
+            self._addr = cmd & 0x7F
+            self._cg = False
+        elif cmd & 0x40:
+            self._addr = cmd & 0x3F
+            self._cg = True
+        elif cmd & 0x20:
+            if not self._four_bit and not cmd & 0x10:
+                self._four_bit = True
+        elif cmd == 0x01:
+            self.ddram[:] = b" " * 0x80
+            self._addr = 0
+            self._cg = False
+            self._busy = self.busy_reads
+        elif cmd & 0xFE == 0x02:
+            self._addr = 0
+            self._cg = False
+            self._busy = self.busy_reads
+
+    def _data(self, value):
+        self.data_writes += 1
+        if self._cg:
+            self.cgram[self._addr] = value
+            self._addr = (self._addr + 1) & 0x3F
+            return
+        self.ddram[self._addr] = value
+        self._addr += 1
+        if self._addr == 0x28:
+            self._addr = 0x40
+        elif self._addr >= 0x68:
+            self._addr = 0
+
+    def line(self, y):
+        """Return line y as the LcdApi addressing maps it."""
+        addr = (0x40 if y & 1 else 0) + (self.num_columns if y & 2 else 0)
+        return bytes(self.ddram[addr : addr + self.num_columns])
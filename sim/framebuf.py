@@ -0,0 +1,147 @@
+# Pure Python FrameBuffer for the monochrome formats used by the drivers
+#
+# Text is drawn with a stand-in 8x8 glyph set, not the MicroPython font:
+# every printable character has its own distinct 8 byte pattern so diffing
+# and caching behave as on the device, but the pixels are not identical.
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+MVLSB = MONO_VLSB
+
+
+def _glyph(ch):
+    o = ord(ch)
+    if o == 32 or not 32 < o < 127:
+        return bytes(8)
+    cols = bytearray(8)
+    for i in range(7):
+        cols[i] = 0x41 | (((o * (i + 3)) ^ (o >> (i % 4))) & 0x3E)
+    return bytes(cols)
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buf = buffer
+        self.w = width
+        self.h = height
+        self.format = format
+        self.stride = stride or width
+
+    def _index(self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        offset = y * ((self.stride + 7) >> 3) + (x >> 3)
+        if self.format == MONO_HLSB:
+            return offset, 7 - (x & 7)
+        return offset, x & 7
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return None
+        i, bit = self._index(x, y)
+        if c is None:
+            return (self.buf[i] >> bit) & 1
+        if c:
+            self.buf[i] |= 1 << bit
+        else:
+            self.buf[i] &= ~(1 << bit) & 0xFF
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.w)
+        y1 = min(y + h, self.h)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self.pixel(xx, yy, c)
+
+    def fill(self, c):
+        if self.format == MONO_VLSB and self.stride == self.w:
+            value = 0xFF if c else 0
+            for i in range(len(self.buf)):
+                self.buf[i] = value
+        else:
+            self.fill_rect(0, 0, self.w, self.h, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0xF):
+        for yy in range(-yr, yr + 1):
+            for xx in range(-xr, xr + 1):
+                d = (xx * xx) * (yr * yr) + (yy * yy) * (xr * xr)
+                if d <= (xr * xr) * (yr * yr):
+                    if f or d >= ((xr - 1) * (xr - 1)) * ((yr - 1) * (yr - 1)):
+                        self.pixel(x + xx, y + yy, c)
+
+    def poly(self, x, y, coords, c, f=False):
+        n = len(coords) // 2
+        for i in range(n):
+            j = (i + 1) % n
+            self.line(
+                x + coords[2 * i], y + coords[2 * i + 1],
+                x + coords[2 * j], y + coords[2 * j + 1], c,
+            )
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            glyph = _glyph(ch)
+            for col in range(8):
+                bits = glyph[col]
+                for row in range(8):
+                    if bits >> row & 1:
+                        self.pixel(x + col, y + row, c)
+            x += 8
+
+    def scroll(self, xstep, ystep):
+        w, h = self.w, self.h
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        for yy in ys:
+            for xx in xs:
+                sx, sy = xx - xstep, yy - ystep
+                if 0 <= sx < w and 0 <= sy < h:
+                    self.pixel(xx, yy, self.pixel(sx, sy))
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            # (buffer, width, height, format[, stride]) as in MicroPython 1.20+
+            fbuf = FrameBuffer(*fbuf)
+        for yy in range(fbuf.h):
+            for xx in range(fbuf.w):
+                c = fbuf.pixel(xx, yy)
+                if palette is not None:
+                    c = palette.pixel(c, 0)
+                if c != key:
+                    self.pixel(x + xx, y + yy, c)
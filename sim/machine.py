@@ -0,0 +1,252 @@
+# Simulated subset of the MicroPython machine module
+
+from ._core import clock, log
+
+# byte-level timing model: I2C sends 9 clocks per byte (8 data + ACK) plus
+# the address byte and a start/stop condition, SPI sends 8 clocks per byte
+_I2C_FRAME_BITS = 2
+
+
+def freq(hz=None):
+    return 125_000_000
+
+
+def unique_id():
+    return b"\xe6\x61\x38\x51\x13\x4a\x2d\x2e"
+
+
+def idle():
+    pass
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._mode = self.IN
+        self._value = 0
+        self._handler = None
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self._mode = mode
+        if value is not None:
+            self(value)
+
+    def __call__(self, value=None):
+        if value is None:
+            return self._value
+        self._value = 1 if value else 0
+        log.record("pin", "write", self.id, (self._value,), 0)
+
+    def value(self, value=None):
+        return self(value)
+
+    def on(self):
+        self(1)
+
+    def off(self):
+        self(0)
+
+    def high(self):
+        self(1)
+
+    def low(self):
+        self(0)
+
+    def toggle(self):
+        self(not self._value)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self._handler = handler
+
+    def __repr__(self):
+        return "Pin({})".format(self.id)
+
+
+class I2C:
+    def __init__(self, id=0, scl=None, sda=None, freq=400_000):
+        self.id = id
+        self.freq = freq
+        self.devices = {}
+
+    def attach(self, addr, device):
+        """Attach a device model answering reads, see `readfrom`."""
+        self.devices[addr] = device
+
+    def _transfer(self, kind, addr, data):
+        bits = 9 * (len(data) + 1) + _I2C_FRAME_BITS
+        log.record("i2c%d" % self.id, kind, addr, data, bits * 1_000_000 / self.freq)
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto(self, addr, buf, stop=True):
+        data = bytes(buf)
+        self._transfer("write", addr, data)
+        device = self.devices.get(addr)
+        if device is not None and hasattr(device, "write"):
+            device.write(data)
+        return len(data)
+
+    def writevto(self, addr, vector, stop=True):
+        data = b"".join(bytes(b) for b in vector)
+        return self.writeto(addr, data, stop)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        device = self.devices.get(addr)
+        if device is not None and hasattr(device, "read"):
+            data = bytes(device.read(nbytes))
+        else:
+            data = bytes(nbytes)
+        self._transfer("read", addr, data)
+        return data
+
+    def readfrom_into(self, addr, buf, stop=True):
+        buf[:] = self.readfrom(addr, len(buf), stop)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        self.writeto(addr, bytes((memaddr,)), False)
+        return self.readfrom(addr, nbytes)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self.writeto(addr, bytes((memaddr,)) + bytes(buf))
+
+
+class SoftI2C(I2C):
+    pass
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id=0, baudrate=1_000_000, polarity=0, phase=0, **kw):
+        self.id = id
+        self.baudrate = baudrate
+        self.polarity = polarity
+        self.phase = phase
+        self.inits = 0
+
+    def init(self, baudrate=None, polarity=None, phase=None, **kw):
+        self.inits += 1
+        if baudrate is not None:
+            self.baudrate = baudrate
+        if polarity is not None:
+            self.polarity = polarity
+        if phase is not None:
+            self.phase = phase
+        log.record("spi%d" % self.id, "init", None, b"", 0)
+
+    def deinit(self):
+        pass
+
+    def write(self, buf):
+        data = bytes(buf)
+        log.record(
+            "spi%d" % self.id, "write", None, data, 8 * len(data) * 1_000_000 / self.baudrate
+        )
+
+    def read(self, nbytes, write=0x00):
+        self.write(bytes((write,)) * nbytes)
+        return bytes(nbytes)
+
+    def readinto(self, buf, write=0x00):
+        buf[:] = self.read(len(buf), write)
+
+    def write_readinto(self, write_buf, read_buf):
+        self.write(write_buf)
+        read_buf[:] = bytes(len(read_buf))
+
+
+class SoftSPI(SPI):
+    pass
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin
+        self._freq = freq or 1000
+        self._duty = duty_u16 or 0
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        self._duty = value
+
+    def deinit(self):
+        self._duty = 0
+
+
+class ADC:
+    """ADC returning `ADC.source(channel)` if set, else mid-scale readings.
+
+    Channel 4 defaults to the RP2040 temperature sensor at about 27 C with
+    a little deterministic noise.
+    """
+
+    source = None
+
+    def __init__(self, pin):
+        self.channel = pin if isinstance(pin, int) else getattr(pin, "id", pin)
+        self._n = 0
+
+    def read_u16(self):
+        if ADC.source is not None:
+            return int(ADC.source(self.channel)) & 0xFFFF
+        self._n += 1
+        noise = (self._n * 7919) % 97 - 48
+        if self.channel == 4:
+            return 14021 + noise
+        return 32768 + noise
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kw):
+        self.id = id
+        self._callback = None
+        if kw:
+            self.init(**kw)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None, tick_hz=1000):
+        self.deinit()
+        if freq > 0:
+            self._period_us = 1_000_000 / freq
+        else:
+            self._period_us = period * 1_000_000 / tick_hz
+        self._mode = mode
+        self._callback = callback
+        self._deadline_us = clock.now_us + self._period_us
+        clock.timers.append(self)
+
+    def deinit(self):
+        if self in clock.timers:
+            clock.timers.remove(self)
+
+    def _fire(self):
+        if self._mode == self.PERIODIC:
+            self._deadline_us += self._period_us
+        else:
+            self.deinit()
+        if self._callback is not None:
+            self._callback(self)
@@ -0,0 +1,44 @@
+# Simulated utime module running on the virtual clock
+
+from ._core import clock
+
+
+def sleep(seconds):
+    clock.advance(seconds * 1_000_000)
+
+
+def sleep_ms(ms):
+    clock.advance(ms * 1_000)
+
+
+def sleep_us(us):
+    clock.advance(us)
+
+
+def ticks_us():
+    return int(clock.now_us) & 0x3FFFFFFF
+
+
+def ticks_ms():
+    return int(clock.now_us // 1_000) & 0x3FFFFFFF
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & 0x3FFFFFFF
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & 0x3FFFFFFF
+    return diff - 0x40000000 if diff & 0x20000000 else diff
+
+
+def time():
+    return int(clock.now_us // 1_000_000)
+
+
+def time_ns():
+    return int(clock.now_us * 1_000)
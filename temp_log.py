@@ -0,0 +1,161 @@
+# Binary log for sensor readings, kept in flash as a ring of segment files
+#
+#     from temp_log import TempLog
+#     log = TempLog("temps")
+#     log.append(23.4)
+#
+# Each record is 6 bytes: a u32 timestamp in seconds and the value times
+# scale as an int16. Records collect in a page-sized RAM buffer that is
+# appended to the newest segment file when it fills (or on flush()), so
+# flash sees one write per page instead of one per reading. Segments are
+# only ever appended to, never rewritten in place: littlefs copies a file
+# from the first changed block to its end, so a write in the middle of one
+# big file would cost far more than the page itself. Once a segment is
+# full, the next page starts a new one and the oldest is deleted, which
+# makes the log a ring over whole files. After a reset it carries on at
+# the end of the newest segment.
+#
+# Segments are named by sequence number, 00000001.log and so on, in the
+# log directory. Layout, little endian:
+#   header   "TLOG", version (u16), scale (u16), sequence number (u32)
+#   records  timestamp (u32), value (i16), up to the end of the file
+#
+# log_query.py reads these directories on a PC.
+
+import os
+import struct
+import time
+
+MAGIC = b"TLOG"
+VERSION = 2
+HEADER = "<4sHHI"
+HEADER_SIZE = 12
+RECORD = "<Ih"
+RECORD_SIZE = 6
+
+
+class TempLog:
+    """Append readings to a log of at most segments files in directory
+    path, each holding segment_records readings.
+
+    The defaults keep 128 segments of 680 readings, one 4 KB flash block
+    each: up to 87040 readings, two months at one a minute. The oldest
+    segment is only deleted when the next page needs a new one.
+    """
+
+    def __init__(self, path="temps", segments=128, segment_records=680, page_size=512, scale=100):
+        self.path = path
+        self.segments = segments
+        self.segment_records = segment_records
+        self.scale = scale
+        self.page = bytearray(page_size // RECORD_SIZE * RECORD_SIZE)
+        self._page_mv = memoryview(self.page)
+        self.per_page = len(self.page) // RECORD_SIZE
+        self.count = 0
+        self._file = None
+        try:
+            os.mkdir(path)
+        except OSError:
+            pass  # already there
+        self._seqs = self._list()
+        self._resume()
+
+    def _list(self):
+        seqs = []
+        for name in os.listdir(self.path):
+            if name.endswith(".log"):
+                try:
+                    seqs.append(int(name[:-4]))
+                except ValueError:
+                    pass
+        seqs.sort()
+        return seqs
+
+    def _name(self, seq):
+        return "%s/%08d.log" % (self.path, seq)
+
+    def _resume(self):
+        # with no segment open, the next flush() starts segment seq + 1
+        self.seq = 0
+        self.written = 0
+        if not self._seqs:
+            return
+        seq = self._seqs[-1]
+        name = self._name(seq)
+        n = os.stat(name)[6] - HEADER_SIZE
+        with open(name, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        # carry on in the newest segment unless it is full, from another
+        # scale, or ends in a record cut short by a reset
+        if (
+            len(header) == HEADER_SIZE
+            and struct.unpack(HEADER, header) == (MAGIC, VERSION, self.scale, seq)
+            and n % RECORD_SIZE == 0
+            and n // RECORD_SIZE < self.segment_records
+        ):
+            self.written = n // RECORD_SIZE
+            self._file = open(name, "ab")
+        self.seq = seq
+
+    def _new_segment(self, seq):
+        self.seq = seq
+        self.written = 0
+        self._file = open(self._name(seq), "wb")
+        self._file.write(struct.pack(HEADER, MAGIC, VERSION, self.scale, seq))
+        self._file.flush()
+        self._seqs.append(seq)
+        while len(self._seqs) > self.segments:
+            os.remove(self._name(self._seqs.pop(0)))
+
+    def append(self, value, t=None):
+        """Add a reading, stamped with time.time() unless t is given."""
+        if t is None:
+            t = int(time.time())
+        v = int(round(value * self.scale))
+        v = max(-32768, min(v, 32767))
+        struct.pack_into(RECORD, self.page, self.count * RECORD_SIZE, t, v)
+        self.count += 1
+        if self.count == self.per_page or self.written + self.count == self.segment_records:
+            self.flush()
+
+    def flush(self):
+        """Append the readings still in RAM to the newest segment."""
+        if not self.count:
+            return
+        if self._file is None:
+            self._new_segment(self.seq + 1)
+        self._file.write(self._page_mv[: self.count * RECORD_SIZE])
+        self._file.flush()
+        self.written += self.count
+        self.count = 0
+        if self.written >= self.segment_records:
+            # the next segment is only made for the next page, so the full
+            # ones are all kept until then
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+    def records(self):
+        """Yield (timestamp, value) for every reading in the log, oldest
+        first. The readings still in RAM are flushed first."""
+        self.flush()
+        buf = bytearray(len(self.page))
+        for seq in list(self._seqs):
+            with open(self._name(seq), "rb") as f:
+                header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    continue
+                magic, version, scale, _ = struct.unpack(HEADER, header)
+                if magic != MAGIC or version != VERSION:
+                    continue
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    for i in range(n // RECORD_SIZE):
+                        t, v = struct.unpack_from(RECORD, buf, i * RECORD_SIZE)
+                        yield t, v / scale
@@ -1,19 +1,13 @@
-import machine
+from temp_sensor import TempSensor
 import utime
 
-# Analog To Digital Converter
-# TEMPERATURE SENSOR ON CHANNEL 4
-sensor_temp = machine.ADC(4)
-
-# GET THE VOLTAGE VALUE INSTEAD OF 65535
-convertion_factor = 3.3 / (65535)
+# RP2040 TEMPERATURE SENSOR ON ADC CHANNEL 4
+# 16 SAMPLES PER READING, MEDIAN OF THE LAST 5 READINGS
+sensor = TempSensor(samples=16, filter="median")
 
 # READ VALUES
 while True:
-    reading = sensor_temp.read_u16() * convertion_factor
-    # CONVERT VOLTAGE VALUES TO DEGREE CELCIUS
-    # (EACH SENSOR HAS ITS OWN CONVERTION EQUATION)
-    temperature = (27 - (reading - 0.706) / 0.001721)
-    # ADD * 0.2 IF USED WITH LED SCREEN
+    temperature = sensor.read()
+    # PASS gain=-0.2 TO TempSensor IF USED WITH LED SCREEN, AS LED_display_temp.py DOES
     print(temperature)
     utime.sleep(2)